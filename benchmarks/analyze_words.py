@@ -0,0 +1,64 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SPACY_MODEL
+from modules.analysis import AnalysisCache, WordAnalyzer
+
+
+def sample_words(count):
+    base = ["run", "happy", "London", "quickly", "the", "beautiful", "Paris", "swim", "under", "seven"]
+    return [f"{base[i % len(base)]}{i // len(base) or ''}" for i in range(count)]
+
+
+def legacy_analyze(nlp, words, batch_size=100):
+    # What get_new_words_from_json used to do: full pipeline, lazy pipe
+    # generators submitted to a thread pool and consumed on the main thread.
+    analyzed = {}
+    with ThreadPoolExecutor() as executor:
+        futures = [executor.submit(nlp.pipe, words[i : i + batch_size]) for i in range(0, len(words), batch_size)]
+        for future in futures:
+            for doc in future.result():
+                token = doc[0]
+                analyzed[token.text] = (token.lemma_, token.pos_, token.ent_type_)
+    return analyzed
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32}{elapsed:>8.2f}s {count / elapsed:>10.0f} words/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word analysis throughput: legacy thread pool vs WordAnalyzer")
+    parser.add_argument("--words", type=int, default=20_000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    import spacy
+
+    nlp = spacy.load(SPACY_MODEL)
+    words = sample_words(args.words)
+    print(f"{SPACY_MODEL} pipeline: {nlp.pipe_names}, {os.cpu_count()} CPUs")
+
+    timed("legacy thread pool", len(words), lambda: legacy_analyze(nlp, words))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_process in dict.fromkeys(args.processes):
+            cache = AnalysisCache(os.path.join(tmp, f"analysis{n_process}.db"), model=SPACY_MODEL)
+            analyzer = WordAnalyzer(
+                lambda: nlp, cache, n_process=n_process, batch_size=args.batch_size, parallel_min_words=0
+            )
+            timed(f"analyzer, {n_process} process(es), cold", len(words), lambda: analyzer.analyze_many(words))
+            analyzer.memory.clear()
+            timed(f"analyzer, {n_process} process(es), cache", len(words), lambda: analyzer.analyze_many(words))
+            timed(f"analyzer, {n_process} process(es), memory", len(words), lambda: analyzer.analyze_many(words))
+            print(f"  stats: {analyzer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.fuzzy_lookup import synthetic_vocabulary
+from modules.db_pool import ConnectionPool
+from modules.schema import existing_words, insert_words, migrate, pos_for_words
+
+
+def per_word(pool, words):
+    # What process_file used to do: one EXISTS query, one reader trip, per word.
+    return {word for word in words if pool.fetchone("SELECT EXISTS(SELECT 1 FROM words WHERE word = ?)", (word,))[0]}
+
+
+def per_word_pos(pool, words):
+    found = {}
+    for word in words:
+        row = pool.fetchone("SELECT pos FROM words WHERE word = ?", (word,))
+        if row:
+            found[word] = row[0]
+    return found
+
+
+def timed_run(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-word lookups against set-at-a-time IN (...) lookups")
+    parser.add_argument("--stored", type=int, default=200_000, help="words in the table")
+    parser.add_argument("--queries", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--hit-rate", type=float, default=0.5, help="share of queried words that are stored")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = synthetic_vocabulary(args.stored * 2, rng)
+    stored, absent = vocabulary[: args.stored], vocabulary[args.stored :]
+
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "words.db"), readers=1, init=migrate)
+        try:
+            pool.write(insert_words, [(word, word, None, "NOUN", None) for word in stored])
+            for count in args.queries:
+                hits = int(count * args.hit_rate)
+                words = rng.sample(stored, hits) + rng.sample(absent, count - hits)
+                rng.shuffle(words)
+
+                slow, slow_time = timed_run(per_word, pool, words)
+                fast, fast_time = timed_run(pool.read, existing_words, words)
+                assert slow == fast
+                slow_pos, slow_pos_time = timed_run(per_word_pos, pool, words)
+                fast_pos, fast_pos_time = timed_run(pool.read, pos_for_words, words)
+                assert slow_pos == fast_pos
+
+                print(f"{count} words, {hits} stored")
+                print(f"  exists  per word {slow_time * 1e3:9.1f}ms   batch {fast_time * 1e3:8.1f}ms   ({slow_time / fast_time:.0f}x)")
+                print(f"  pos     per word {slow_pos_time * 1e3:9.1f}ms   batch {fast_pos_time * 1e3:8.1f}ms   ({slow_pos_time / fast_pos_time:.0f}x)")
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
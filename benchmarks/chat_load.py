@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Known words, typos, idioms inside sentences and free text that falls
+# through to similarity search. None of them trigger the unknown-word
+# prompt, so a run leaves the database untouched.
+TURNS = [
+    "hello",
+    "helo",
+    "my grandpa might kick the bucket",
+    "it only happens once in a blue moon",
+    "what a lovely day",
+    "happy",
+    "quickly",
+    "the cat sat on the mat",
+]
+
+
+def start_server():
+    process = subprocess.Popen(
+        [sys.executable, "-u", "chat_server.py", "--port", "0", "--refresh-interval", "0"],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    for line in process.stdout:
+        match = re.search(r"Serving chat sessions on ([\d.]+):(\d+)", line)
+        if match:
+            return process, match.group(1), int(match.group(2))
+    raise RuntimeError("chat_server.py exited before it started serving")
+
+
+async def session(host, port, turns, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    for i in range(turns):
+        start = time.perf_counter()
+        writer.write(TURNS[i % len(TURNS)].encode("utf-8") + b"\n")
+        await writer.drain()
+        reply = await reader.readline()
+        latencies.append(time.perf_counter() - start)
+        if not reply.startswith(b"Bot:"):
+            raise RuntimeError(f"Unexpected reply: {reply!r}")
+    writer.write(b"exit\n")
+    await writer.drain()
+    writer.close()
+
+
+async def run_load(host, port, sessions, turns):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(session(host, port, turns, latencies) for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1e3,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3,
+        "throughput": len(latencies) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reply latency and throughput of chat_server.py under concurrent sessions")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--turns", type=int, default=50, help="turns per session")
+    args = parser.parse_args()
+
+    process, host, port = start_server()
+    try:
+        asyncio.run(run_load(host, port, 1, len(TURNS)))  # warm the caches
+        for sessions in args.sessions:
+            result = asyncio.run(run_load(host, port, sessions, args.turns))
+            print(
+                f"{sessions:>4} sessions: p50 {result['p50']:.2f}ms  p99 {result['p99']:.2f}ms  "
+                f"{result['throughput']:.0f} replies/s"
+            )
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
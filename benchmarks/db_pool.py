@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from modules.db_pool import ConnectionPool
+from modules.schema import QUERIES, insert_words, migrate
+
+
+def rows_for(start, count):
+    return [(f"word{i}", f"lemma{i // 4}", None, "NOUN", None) for i in range(start, start + count)]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples) * 1e3,
+        samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e3,
+        samples[-1] * 1e3,
+    )
+
+
+def run_readers(lookup, words, threads, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader(seed):
+        rng = random.Random(seed)
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            lookup(f"word{rng.randrange(words)}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies
+
+
+def ingest(write, start, batches, batch_size, stop):
+    for b in range(batches):
+        if stop.is_set():
+            return
+        write(rows_for(start + b * batch_size, batch_size))
+
+
+def measure(label, lookup, write, words, args):
+    idle = run_readers(lookup, words, args.readers, args.seconds)
+    stop = threading.Event()
+    writer = threading.Thread(target=ingest, args=(write, words, 10_000, args.batch_size, stop))
+    writer.start()
+    busy = run_readers(lookup, words, args.readers, args.seconds)
+    stop.set()
+    writer.join()
+    for name, samples in (("idle", idle), ("during ingest", busy)):
+        p50, p99, worst = percentiles(samples)
+        print(
+            f"{label:<22}{name:<15}{len(samples) / args.seconds:>10.0f} lookups/s  "
+            f"p50 {p50:.3f}ms  p99 {p99:.3f}ms  max {worst:.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lookup latency with and without concurrent ingestion")
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # One shared connection behind a lock, as before the pool.
+        path = os.path.join(tmp, "shared.db")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        migrate(conn)
+        insert_words(conn, rows_for(0, args.words))
+        conn.commit()
+        lock = threading.Lock()
+
+        def shared_lookup(word):
+            with lock:
+                conn.execute(QUERIES["word"], (word,)).fetchone()
+
+        def shared_write(rows):
+            with lock:
+                insert_words(conn, rows)
+                conn.commit()
+
+        measure("shared connection", shared_lookup, shared_write, args.words, args)
+        conn.close()
+
+        path = os.path.join(tmp, "pool.db")
+        pool = ConnectionPool(path, readers=args.readers, init=migrate)
+        pool.write(insert_words, rows_for(0, args.words))
+        measure(
+            "WAL pool",
+            lambda word: pool.fetchone(QUERIES["word"], (word,)),
+            lambda rows: pool.write(insert_words, rows),
+            args.words,
+            args,
+        )
+        print(f"pool stats: {pool.stats}")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stub_dictionary_server import start_stub_server, stub_sources
+from modules.definition_cache import DefinitionCache
+
+
+def sample_words(count):
+    words = []
+    for i in range(count):
+        if i % 20 == 0:
+            words.append(f"missing{i}")
+        elif i % 25 == 0:
+            words.append(f"flaky{i}")
+        else:
+            words.append(f"word{i}")
+    # Repeat a slice so in-flight de-duplication has something to do.
+    return words + words[: count // 10]
+
+
+async def run(words, sources, cache, concurrency, rate):
+    from database_utils import create_definition_fetcher
+    import database_utils
+
+    database_utils.max_concurrent_requests = concurrency
+    fetcher = create_definition_fetcher(sources, cache=cache)
+    fetcher.limiter.interval = 1.0 / rate if rate else 0.0
+    fetcher.backoff = 0.05
+
+    start = time.perf_counter()
+    async with fetcher:
+        results = await asyncio.gather(*(fetcher.fetch_definition(word) for word in words))
+    definitions = dict(zip(words, results))
+    elapsed = time.perf_counter() - start
+    return definitions, elapsed, fetcher.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Definition fetch throughput against the local stub server")
+    parser.add_argument("--words", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=0, help="per-host requests per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    words = sample_words(args.words)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DefinitionCache(os.path.join(tmp, "cache.db"), ttl=3600, negative_ttl=60, max_entries=len(words) * 2)
+        for label in ("cold", "warm"):
+            definitions, elapsed, stats = asyncio.run(
+                run(words, stub_sources(base_url), cache, args.concurrency, args.rate)
+            )
+            found = sum(1 for definition in definitions.values() if definition)
+            print(
+                f"{label}: {len(words)} lookups in {elapsed:.2f}s "
+                f"({len(words) / elapsed:.0f} lookups/s), {found} defined, fetcher {stats}"
+            )
+        print(f"cache: {cache.stats()}, server requests: {server.request_count}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import random
+import statistics
+import string
+import time
+
+from modules.fuzzy_index import FuzzyIndex
+
+LETTERS = string.ascii_lowercase
+# Rough English letter frequencies so synthetic words share prefixes the way
+# real vocabularies do.
+WEIGHTS = [8.2, 1.5, 2.8, 4.3, 12.7, 2.2, 2.0, 6.1, 7.0, 0.2, 0.8, 4.0, 2.4,
+           6.7, 7.5, 1.9, 0.1, 6.0, 6.3, 9.1, 2.8, 1.0, 2.4, 0.2, 2.0, 0.1]
+
+
+def synthetic_vocabulary(count, rng):
+    words = set()
+    while len(words) < count:
+        length = max(2, min(14, int(rng.gauss(7, 2.5))))
+        words.add("".join(rng.choices(LETTERS, WEIGHTS, k=length)))
+    return list(words)
+
+
+def misspell(word, edits, rng):
+    chars = list(word)
+    for _ in range(edits):
+        op = rng.randrange(4)
+        i = rng.randrange(len(chars))
+        if op == 0 and len(chars) > 1:
+            del chars[i]
+        elif op == 1:
+            chars.insert(i, rng.choice(LETTERS))
+        elif op == 2:
+            chars[i] = rng.choice(LETTERS)
+        elif i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def time_lookups(index, queries, limit):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query, limit=limit)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy index build time and lookup latency by lexicon size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-distance", type=int, default=2)
+    parser.add_argument("--prefix-length", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for size in args.sizes:
+        words = synthetic_vocabulary(size, rng)
+        index = FuzzyIndex(max_distance=args.max_distance, prefix_length=args.prefix_length)
+        start = time.perf_counter()
+        index.add_many(words)
+        build = time.perf_counter() - start
+
+        sample = rng.sample(words, args.queries)
+        workloads = {
+            "exact": sample,
+            "1 edit": [misspell(word, 1, rng) for word in sample],
+            "2 edits": [misspell(word, 2, rng) for word in sample],
+            "unknown": ["".join(rng.choices(LETTERS, k=len(word))) for word in sample],
+        }
+        print(f"{size} words: built in {build:.2f}s, {len(index.deletes)} delete keys")
+        for name, queries in workloads.items():
+            # Top 1 is what generate_response asks for; top 5 is a suggestion list.
+            top1 = time_lookups(index, queries, limit=1)
+            top5 = time_lookups(index, queries, limit=5)
+            print(
+                f"  {name:<10} top 1: p50 {top1[0]:>7.1f}us p99 {top1[1]:>8.1f}us   "
+                f"top 5: p50 {top5[0]:>7.1f}us p99 {top5[1]:>8.1f}us"
+            )
+        del index, words
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from benchmarks.fuzzy_lookup import synthetic_vocabulary
+from modules.lexicon import Lexicon
+
+POS = ["NOUN", "VERB", "ADJ", "ADV", "PROPN", "INTJ", "ADP", "PRON"]
+ENTITIES = ["", "", "", "", "PERSON", "ORG", "GPE"]
+
+
+def synthetic_entries(count, rng):
+    # Shaped like load_word_data() output: most definitions empty, lemma
+    # usually the word itself, a handful of POS and entity values.
+    for word in synthetic_vocabulary(count, rng):
+        word = word.title()
+        yield word, {
+            "word": word,
+            "definition": f"a {rng.choice(POS).lower()} meaning {word.lower()} things" if rng.random() < 0.3 else "",
+            "lemma": word if rng.random() < 0.8 else word.lower(),
+            "pos": rng.choice(POS),
+            "entity_type": rng.choice(ENTITIES),
+        }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def lookup_time(word_data, words):
+    start = time.perf_counter()
+    for word in words:
+        (word_data.get(word) or {}).get("definition")
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def fresh(text):
+    return text.encode("utf-8").decode("utf-8")
+
+
+def lookup_time_field(lexicon, words):
+    start = time.perf_counter()
+    for word in words:
+        lexicon.field(word, "definition")
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of the columnar Lexicon against a dict of dicts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        entries = list(synthetic_entries(size, random.Random(0)))
+        # Each structure gets its own copy of the strings, as it would when
+        # decoded from JSON or read from SQLite.
+        copies = lambda: (
+            (fresh(word), {key: fresh(value) for key, value in entry.items()}) for word, entry in entries
+        )
+
+        plain, plain_bytes, plain_time = measure(lambda: dict(copies()))
+        del plain
+        lexicon, lexicon_bytes, lexicon_time = measure(lambda: Lexicon(copies()))
+
+        words = [word for word, _ in random.Random(1).sample(entries, min(args.lookups, size))]
+        plain = dict(entries)
+        print(f"{size} words")
+        print(
+            f"  dict of dicts  {plain_bytes / 2**20:8.1f} MiB  built in {plain_time:.2f}s  "
+            f"lookup {lookup_time(plain, words):.2f}us"
+        )
+        print(
+            f"  Lexicon        {lexicon_bytes / 2**20:8.1f} MiB  built in {lexicon_time:.2f}s  "
+            f"lookup {lookup_time(lexicon, words):.2f}us  "
+            f"field() {lookup_time_field(lexicon, words):.2f}us  ({plain_bytes / lexicon_bytes:.1f}x smaller)"
+        )
+        del plain, lexicon, entries
+
+
+if __name__ == "__main__":
+    main()
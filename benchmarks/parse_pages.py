@@ -0,0 +1,75 @@
+import argparse
+import time
+
+from benchmarks.stub_dictionary_server import load_fixture
+from modules.html_extract import ExtractorPool, extract_oed_definition, extract_urban_definition
+
+
+def legacy_urban_definition(content):
+    # The BeautifulSoup/html.parser extractor this module replaced.
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    definition_div = soup.find("div", attrs={"class": "meaning"})
+    example_div = soup.find("div", attrs={"class": "example"})
+    return (
+        definition_div.text.strip() if definition_div else None,
+        example_div.text.strip() if example_div else None,
+    )
+
+
+def legacy_oed_definition(content):
+    # The full-tree lxml.html + XPath extractor this module replaced.
+    import lxml.html as lhtml
+
+    try:
+        html_tree = lhtml.fromstring(content)
+        return html_tree.xpath("//div[@class='resultsSetItem'][1]//div[@class='snippet']/text()")[0].strip()
+    except (IndexError, AttributeError):
+        return None
+
+
+def fixture_pages(name, count):
+    template = load_fixture(name)
+    return [template.replace("{{word}}", f"word{i}").encode("utf-8") for i in range(count)]
+
+
+def pages_per_second(extractor, pages):
+    start = time.perf_counter()
+    for page in pages:
+        extractor(page)
+    return len(pages) / (time.perf_counter() - start)
+
+
+def pool_pages_per_second(kind, workers, extractor, pages):
+    pool = ExtractorPool(kind, workers=workers)
+    pool.map(extractor, pages[:workers])
+    start = time.perf_counter()
+    pool.map(extractor, pages, chunksize=32)
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return len(pages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pages parsed per second against the saved fixture pages")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    cases = [
+        ("urbandictionary", "urbandictionary.html", legacy_urban_definition, extract_urban_definition),
+        ("oed", "oed.html", legacy_oed_definition, extract_oed_definition),
+    ]
+    for name, fixture, legacy, extractor in cases:
+        pages = fixture_pages(fixture, args.pages)
+        assert legacy(pages[0]) == extractor(pages[0])
+        print(f"{name}: legacy          {pages_per_second(legacy, pages):8.0f} pages/s")
+        print(f"{name}: extractor       {pages_per_second(extractor, pages):8.0f} pages/s")
+        for kind in ("thread", "process"):
+            rate = pool_pages_per_second(kind, args.workers, extractor, pages)
+            print(f"{name}: {kind} pool x{args.workers:<3} {rate:8.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import random
+import statistics
+import time
+
+from modules.phrase_matcher import PhraseMatcher, phrase_tokens
+
+
+def synthetic_phrases(count, vocabulary, rng):
+    phrases = set()
+    while len(phrases) < count:
+        phrases.add(" ".join(rng.choices(vocabulary, k=rng.randint(1, 5))))
+    return list(phrases)
+
+
+def naive_find(phrases, text):
+    # One scan of the sentence per phrase, as matching every entry
+    # separately would do.
+    tokens = phrase_tokens(text)
+    matches = []
+    for phrase, phrase_token_list in phrases:
+        n = len(phrase_token_list)
+        for i in range(len(tokens) - n + 1):
+            if tokens[i : i + n] == phrase_token_list:
+                matches.append((i, i + n, phrase))
+    return matches
+
+
+def time_per_sentence(func, sentences):
+    samples = []
+    for sentence in sentences:
+        start = time.perf_counter()
+        func(sentence)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phrase matching cost by number of lexicon entries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--sentence-length", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5_000)]
+    for size in args.sizes:
+        phrases = synthetic_phrases(size, vocabulary, rng)
+        start = time.perf_counter()
+        matcher = PhraseMatcher()
+        matcher.add_many(phrases)
+        matcher.find_all("")
+        build = time.perf_counter() - start
+
+        sentences = []
+        for _ in range(args.sentences):
+            words = rng.choices(vocabulary, k=args.sentence_length)
+            # Plant a couple of known phrases in every sentence.
+            for phrase in rng.sample(phrases, 2):
+                at = rng.randrange(len(words))
+                words[at:at] = phrase.split()
+            sentences.append(" ".join(words))
+
+        tokenized = [(phrase, phrase_tokens(phrase)) for phrase in phrases]
+        automaton = time_per_sentence(matcher.find_all, sentences)
+        naive = time_per_sentence(lambda s: naive_find(tokenized, s), sentences[:20])
+        print(
+            f"{size:>7} phrases: built in {build:.2f}s, "
+            f"automaton {automaton:>7.1f}us/sentence, naive {naive:>10.1f}us/sentence"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+import pyphen
+
+from modules.pronunciation import ARPABET_TO_IPA, PronunciationTable, arpabet_to_ipa, build_pronunciation_table
+
+VOWELS = [phone for phone in ARPABET_TO_IPA if phone[0] in "AEIOU"]
+CONSONANTS = [phone for phone in ARPABET_TO_IPA if phone not in VOWELS]
+
+
+def synthetic_entries(count, rng):
+    # CMUdict-shaped (word, phones) pairs; about 7% of words get a second
+    # pronunciation, as in the real dictionary.
+    entries = []
+    words = set()
+    while len(words) < count:
+        word = "".join(rng.choices(string.ascii_lowercase, k=max(2, int(rng.gauss(7, 2.5)))))
+        if word in words:
+            continue
+        words.add(word)
+        for _ in range(2 if rng.random() < 0.07 else 1):
+            phones = []
+            for _ in range(max(1, len(word) // 3)):
+                phones.append(rng.choice(CONSONANTS))
+                phones.append(rng.choice(VOWELS) + rng.choice("012"))
+            entries.append((word, phones))
+    return entries
+
+
+def cmudict_entries():
+    from nltk.corpus import cmudict
+    return cmudict.entries()
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def per_word(fn, words):
+    start = time.perf_counter()
+    fn(words)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CMUdict IPA table against an in-memory cmudict.dict()")
+    parser.add_argument("--words", type=int, default=135_000, help="synthetic dictionary size")
+    parser.add_argument("--cmudict", action="store_true", help="use NLTK's CMUdict instead of synthetic entries")
+    parser.add_argument("--queries", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=1000, help="words per get_many call")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    entries = list(cmudict_entries()) if args.cmudict else synthetic_entries(args.words, rng)
+
+    def build_dict():
+        # What cmudict.dict() holds: every pronunciation as a list of phones.
+        pronunciations = {}
+        for word, phones in entries:
+            pronunciations.setdefault(word, []).append(list(phones))
+        return pronunciations
+
+    def build_ipa_dict():
+        pronunciations = {}
+        for word, phones in entries:
+            pronunciations.setdefault(word, arpabet_to_ipa(phones))
+        return pronunciations
+
+    cmu, cmu_bytes, cmu_time = measure(build_dict)
+    ipa, ipa_bytes, ipa_time = measure(build_ipa_dict)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pronunciations.ipa")
+        start = time.perf_counter()
+        build_pronunciation_table(entries, path)
+        build_time = time.perf_counter() - start
+        table, table_bytes, open_time = measure(lambda: PronunciationTable(path))
+        file_bytes = os.path.getsize(path)
+
+        print(f"{len(cmu)} words")
+        print(f"  cmudict.dict()     heap {cmu_bytes / 2**20:7.1f} MiB   built in {cmu_time:.2f}s")
+        print(f"  IPA dict           heap {ipa_bytes / 2**20:7.1f} MiB   built in {ipa_time:.2f}s")
+        print(
+            f"  mmap table         heap {table_bytes / 2**20:7.3f} MiB   file {file_bytes / 2**20:.1f} MiB   "
+            f"built in {build_time:.2f}s, opened in {open_time * 1e3:.2f}ms"
+        )
+
+        words = list(cmu)
+        known = [rng.choice(words) for _ in range(args.queries)]
+        unknown = ["".join(rng.choices(string.ascii_lowercase, k=len(word))) + "q" for word in known]
+        batches = lambda fn: lambda queries: [fn(queries[i : i + args.batch]) for i in range(0, len(queries), args.batch)]
+        lookups = {
+            "cmudict.dict() + convert": lambda queries: [arpabet_to_ipa(cmu[word][0]) for word in queries if word in cmu],
+            "IPA dict": lambda queries: [ipa.get(word) for word in queries],
+            "table.get": lambda queries: [table.get(word) for word in queries],
+            f"table.get_many ({args.batch})": batches(table.get_many),
+        }
+        print("Lookup, microseconds per word")
+        for name, fn in lookups.items():
+            print(f"  {name:<26} known {per_word(fn, known):6.2f}   unknown {per_word(fn, unknown):6.2f}")
+
+        hyphenator = pyphen.Pyphen(lang="en")
+        sample = unknown[:2000]
+        print("Hyphenation fallback, microseconds per word")
+        print(f"  new Pyphen per call        {per_word(lambda q: [pyphen.Pyphen(lang='en').inserted(w) for w in q], sample):8.1f}")
+        print(f"  shared Pyphen              {per_word(lambda q: [hyphenator.inserted(w) for w in q], sample):8.1f}")
+        table.close()
+
+
+if __name__ == "__main__":
+    main()
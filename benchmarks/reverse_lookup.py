@@ -0,0 +1,79 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+
+from benchmarks.fuzzy_lookup import synthetic_vocabulary
+from modules.schema import insert_words, like_search, migrate, search_definitions, search_terms
+
+
+def synthetic_definitions(count, rng, vocabulary_size=20_000):
+    # Definitions drawn from a Zipf-like vocabulary, so a few words appear
+    # in most definitions and most appear in only a handful, as in English.
+    vocabulary = synthetic_vocabulary(vocabulary_size, rng)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(vocabulary_size)))
+    for word in synthetic_vocabulary(count, rng):
+        yield word, " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(4, 14)))
+
+
+def build_database(path, count, rng):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    entries = list(synthetic_definitions(count, rng))
+    start = time.perf_counter()
+    conn.execute("BEGIN")
+    insert_words(conn, [(word, None, None, "NOUN", definition) for word, definition in entries], source="benchmark")
+    conn.commit()
+    return conn, [definition for _, definition in entries], time.perf_counter() - start
+
+
+def queries(definitions, count, rng):
+    # Two or three words from one definition, the last one cut short the
+    # way a half-typed query would be.
+    result = []
+    for _ in range(count):
+        terms = rng.choice(definitions).split()
+        picked = rng.sample(terms, min(len(terms), rng.randint(2, 3)))
+        picked[-1] = picked[-1][: max(3, len(picked[-1]) - 2)]
+        result.append(" ".join(picked))
+    return result
+
+
+def latencies(search, conn, texts, limit):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        search(conn, text, limit)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples) * 1e3, samples[int(len(samples) * 0.99)] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS5 reverse-dictionary search against a LIKE scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    like = lambda conn, text, limit: like_search(conn, search_terms(text), limit)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"words{size}.db")
+            conn, definitions, build = build_database(path, size, rng)
+            texts = queries(definitions, args.queries, rng)
+
+            print(f"{size} definitions (inserted and indexed in {build:.1f}s)")
+            for name, search in (("fts5 bm25", search_definitions), ("LIKE scan", like)):
+                p50, p99 = latencies(search, conn, texts, args.limit)
+                print(f"  {name:<10} p50 {p50:8.2f}ms   p99 {p99:8.2f}ms")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
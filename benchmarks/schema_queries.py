@@ -0,0 +1,106 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from modules.schema import PARTS_OF_SPEECH, QUERIES, explain, insert_words, migrate
+
+INDEXES = [
+    "idx_words_lemma",
+    "idx_words_pos",
+    "idx_words_word_lower",
+    "idx_word_pos_pos",
+    "idx_definitions_word",
+]
+
+
+def synthetic_rows(count):
+    tags = list(PARTS_OF_SPEECH)
+    rows = []
+    for i in range(count):
+        word = f"Word{i}" if i % 7 == 0 else f"word{i}"
+        definition = f"definition of {word}" if i % 3 == 0 else None
+        rows.append((word, f"lemma{i // 4}", f"w{i}", tags[i % len(tags)], definition))
+    return rows
+
+
+def build_database(path, count):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("BEGIN")
+    insert_words(conn, synthetic_rows(count), source="benchmark")
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def query_params(name, count, rng):
+    i = rng.randrange(count)
+    word = f"Word{i}" if i % 7 == 0 else f"word{i}"
+    if name == "word_nocase":
+        return (word.upper(),)
+    if name == "lemma":
+        return (f"lemma{i // 4}",)
+    if name in ("pos", "words_for_pos"):
+        return (rng.choice(list(PARTS_OF_SPEECH)), 50)
+    return (word,)
+
+
+def full_scans(conn):
+    # Tables a query plan walks end to end instead of searching.
+    scans = {}
+    for name, sql in QUERIES.items():
+        params = query_params(name, 1, random.Random(0))
+        for detail in explain(conn, sql, params):
+            if detail.startswith("SCAN") and "USING" not in detail:
+                scans.setdefault(name, []).append(detail)
+    return scans
+
+
+def time_queries(conn, count, lookups):
+    timings = {}
+    for name, sql in QUERIES.items():
+        rng = random.Random(name)
+        params = [query_params(name, count, rng) for _ in range(lookups)]
+        start = time.perf_counter()
+        for p in params:
+            conn.execute(sql, p).fetchall()
+        timings[name] = (time.perf_counter() - start) / lookups
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plans and lookup latency for the normalized schema")
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        conn = build_database(os.path.join(tmp, "schema.db"), args.words)
+        print(f"Built {args.words} words in {time.perf_counter() - start:.2f}s")
+
+        scans = full_scans(conn)
+        for name, details in scans.items():
+            print(f"FULL SCAN in {name}: {'; '.join(details)}")
+
+        indexed = time_queries(conn, args.words, args.lookups)
+        for index in INDEXES:
+            conn.execute(f"DROP INDEX {index}")
+        unindexed = time_queries(conn, args.words, args.lookups)
+        conn.close()
+
+    print(f"{'query':<15}{'indexed':>12}{'no indexes':>14}{'speedup':>10}")
+    for name in QUERIES:
+        speedup = unindexed[name] / max(indexed[name], 1e-9)
+        print(f"{name:<15}{indexed[name] * 1e6:>10.1f}us{unindexed[name] * 1e6:>12.1f}us{speedup:>9.0f}x")
+
+    if scans:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
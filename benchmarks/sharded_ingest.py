@@ -0,0 +1,43 @@
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.suite import REPO_ROOT, run_worker, write_vocabulary
+from config import PRONUNCIATION_TABLE_PATH
+
+
+def ingest(size, workers, seed):
+    # A cold bulk load of a fresh synthetic vocabulary, in its own process.
+    directory = tempfile.mkdtemp(prefix=f"space-ai-shard-{size}-{workers}-")
+    try:
+        table = os.path.join(REPO_ROOT, PRONUNCIATION_TABLE_PATH)
+        if os.path.exists(table):
+            shutil.copy(table, directory)
+        write_vocabulary(directory, size, seed=seed)
+        return run_worker("ingest", directory, "--ingest-workers", str(workers))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load throughput against the number of ingest worker processes")
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.size} words, {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in args.workers:
+        result = ingest(args.size, workers, args.seed)
+        rate = result["ingest_words_per_second"]
+        baseline = baseline or rate
+        print(
+            f"  {workers:>2} workers  {rate:>9.0f} words/s  {rate / baseline:5.2f}x  "
+            f"peak RSS {result['ingest_peak_rss_mb']} MiB (loader only)"
+        )
+
+
+if __name__ == "__main__":
+    main()
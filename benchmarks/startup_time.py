@@ -0,0 +1,78 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from config import LEXICON_BUNDLE_PATH
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"You: "
+
+
+def read_prompt(process):
+    output = b""
+    while not output.endswith(PROMPT):
+        chunk = process.stdout.read(1)
+        if not chunk:
+            process.wait()
+            raise RuntimeError(f"main.py exited before showing a prompt: {output.decode(errors='replace')}")
+        output += chunk
+
+
+def time_to_prompt(extra_args=(), first_input=None):
+    # Launch to first prompt, or with first_input to the prompt after the
+    # first reply, which is when the lazily built indexes are in place.
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "main.py", *extra_args],
+        cwd=REPO_ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    read_prompt(process)
+    if first_input is not None:
+        process.stdin.write(first_input.encode("utf-8") + b"\n")
+        process.stdin.flush()
+        read_prompt(process)
+    elapsed = time.perf_counter() - start
+
+    process.communicate(b"exit\n", timeout=60)
+    return elapsed
+
+
+def time_import(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, check=True)
+    return float(result.stdout)
+
+
+def summarize(label, samples):
+    print(
+        f"{label:<28} min {min(samples) * 1000:8.1f} ms  "
+        f"median {statistics.median(samples) * 1000:8.1f} ms  "
+        f"max {max(samples) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-to-first-prompt time of main.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-input", default="Hello", help="text sent for the time-to-first-reply rows")
+    args = parser.parse_args()
+
+    summarize("import database_utils", [time_import("database_utils") for _ in range(args.runs)])
+    summarize("launch to first prompt", [time_to_prompt(["--no-bundle"]) for _ in range(args.runs)])
+    summarize("launch to prompt (--preload)", [time_to_prompt(["--no-bundle", "--preload"]) for _ in range(args.runs)])
+    summarize("launch to first reply", [time_to_prompt(["--no-bundle"], args.first_input) for _ in range(args.runs)])
+    if os.path.isdir(os.path.join(REPO_ROOT, LEXICON_BUNDLE_PATH)):
+        summarize("launch to prompt (bundle)", [time_to_prompt() for _ in range(args.runs)])
+        summarize("launch to reply (bundle)", [time_to_prompt((), args.first_input) for _ in range(args.runs)])
+    else:
+        print(f"No {LEXICON_BUNDLE_PATH}; run language_data_to_sqlite.py --build-bundle to time bundle startup")
+
+
+if __name__ == "__main__":
+    main()
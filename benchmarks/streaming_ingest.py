@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fuzzy_lookup import synthetic_vocabulary
+from modules.db_pool import ConnectionPool
+from modules.ingest import batched, iter_language_file, normalize_entries, word_rows, write_batches
+from modules.schema import insert_words, migrate
+
+
+def write_language_file(path, count, list_shaped, rng):
+    # Written entry by entry so generating a big file does not need the
+    # whole vocabulary in memory either.
+    words = synthetic_vocabulary(count, rng)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n" if list_shaped else "{\n")
+        for i, word in enumerate(words):
+            entry = {word: {"word": word, "definition": f"definition of {word}" if i % 3 == 0 else ""}}
+            text = json.dumps(entry) if list_shaped else json.dumps(entry)[1:-1]
+            f.write(("    " if i == 0 else ",\n    ") + text)
+        f.write("\n]\n" if list_shaped else "\n}\n")
+
+
+def whole_file(path, db_path, batch_size):
+    # The old loader: json.load, one dict of every entry, then the rows.
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        merged = {}
+        for element in data:
+            merged.update(element)
+        data = merged
+    all_word_data = {word: {**info, "word": word} for word, info in data.items()}
+    rows = [(word, None, None, "ADJECTIVE", info.get("definition") or None) for word, info in all_word_data.items()]
+    for i in range(0, len(rows), batch_size):
+        conn.execute("BEGIN")
+        insert_words(conn, rows[i : i + batch_size], source="benchmark")
+        conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def streamed(path, db_path, batch_size):
+    pool = ConnectionPool(db_path, readers=1, init=migrate)
+    try:
+        batches = batched(normalize_entries(iter_language_file(path)), batch_size)
+        rows = word_rows(batches, lambda words: {})
+        return write_batches(pool, rows, "benchmark")["rows"]
+    finally:
+        pool.close()
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak Python heap of whole-file against streaming ingestion")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--list-shaped", action="store_true", help="write [{word: info}, ...] files instead of {word: info}")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"words{size}.json")
+            write_language_file(path, size, args.list_shaped, rng)
+            print(f"{size} words, {os.path.getsize(path) / 2**20:.1f} MiB file")
+            for name, fn in (("json.load", whole_file), ("streaming", streamed)):
+                db_path = os.path.join(directory, f"{name}{size}.db")
+                rows, elapsed, peak = measure(fn, path, db_path, args.batch_size)
+                print(f"  {name:<10} {rows} rows in {elapsed:6.2f}s ({rows / elapsed:8.0f} rows/s)  peak heap {peak / 2**20:8.1f} MiB")
+                # Tracing doubles the cost of allocation-heavy code.
+                os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
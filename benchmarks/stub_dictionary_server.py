@@ -0,0 +1,109 @@
+import argparse
+import html
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Canned Urban Dictionary and OED pages for offline fetcher runs.
+#
+# Words control the response so retries and negative caching can be exercised:
+#   missing*  404 from both sources
+#   flaky*    503 on the first request for that word, then a normal page
+#   slow*     the page is served after a 2 second delay
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class StubDictionaryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {
+        "/define.php": ("urbandictionary.html", "term"),
+        "/search/dictionary/": ("oed.html", "q"),
+    }
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        page = self.pages.get(url.path)
+        word = parse_qs(url.query).get(page[1], [""])[0] if page else ""
+        self.server.request_count += 1
+
+        if not page or not word or word.startswith("missing"):
+            return self.respond(404, b"Not found")
+
+        if word.startswith("flaky"):
+            with self.server.lock:
+                first_attempt = (url.path, word) not in self.server.seen_flaky
+                self.server.seen_flaky.add((url.path, word))
+            if first_attempt:
+                return self.respond(503, b"Try again")
+
+        if word.startswith("slow"):
+            time.sleep(2)
+
+        body = self.server.fixtures[page[0]].replace("{{word}}", html.escape(word))
+        self.respond(200, body.encode("utf-8"), "text/html; charset=utf-8")
+
+    def respond(self, status, body, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubDictionaryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled keep-alive connections is expected here.
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0):
+    server = StubDictionaryServer((host, port), StubDictionaryHandler)
+    server.fixtures = {name: load_fixture(name) for name, _ in StubDictionaryHandler.pages.values()}
+    server.lock = threading.Lock()
+    server.seen_flaky = set()
+    server.request_count = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def stub_sources(base_url):
+    from modules.definition_fetcher import DefinitionSource
+    from modules.html_extract import extract_oed_definition, extract_urban_definition
+
+    return [
+        DefinitionSource("urbandictionary", base_url + "/define.php?term={word}", extract_urban_definition),
+        DefinitionSource("oed", base_url + "/search/dictionary/?scope=Entries&q={word}", extract_oed_definition),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned dictionary pages for offline runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.host, args.port)
+    print(f"Serving stub dictionary pages at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
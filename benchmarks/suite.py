@@ -0,0 +1,340 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fuzzy_lookup import misspell, synthetic_vocabulary
+from config import PRONUNCIATION_TABLE_PATH
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "RESULT "
+
+# Each vocabulary size runs in a scratch directory laid out like the repo
+# (data/language/*.json plus the databases and caches config.py names), so
+# nothing in the working tree is touched and every run starts cold. The
+# ingest and query stages run in their own subprocess so peak RSS is per
+# stage.
+#
+# Metrics are compared against a baseline by name; the suffix says which
+# direction is better.
+HIGHER_IS_BETTER = ("_per_second",)
+LOWER_IS_BETTER = ("_ms", "_us", "_mb", "_seconds")
+
+# Share of each part-of-speech file in a synthetic vocabulary; idioms are
+# generated separately from the single words.
+POS_FILES = {
+    "nouns.json": 0.45,
+    "verbs.json": 0.2,
+    "adjectives.json": 0.2,
+    "adverbs.json": 0.1,
+    "interjections.json": 0.05,
+}
+IDIOM_SHARE = 0.02
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def write_vocabulary(directory, size, seed=0):
+    # data/language-style files holding `size` entries in total, every one
+    # with a definition so ingestion never goes to the network.
+    rng = random.Random(seed)
+    idiom_count = int(size * IDIOM_SHARE)
+    words = [word.title() for word in synthetic_vocabulary(size - idiom_count, rng)]
+    idioms = set()
+    while len(idioms) < idiom_count:
+        idioms.add(" ".join(rng.sample(words, rng.randint(2, 4))).capitalize())
+
+    language_dir = os.path.join(directory, "data", "language")
+    os.makedirs(language_dir, exist_ok=True)
+    files = {"idioms.json": sorted(idioms)}
+    start = 0
+    for i, (filename, share) in enumerate(POS_FILES.items()):
+        end = len(words) if i == len(POS_FILES) - 1 else start + int(len(words) * share)
+        files[filename] = words[start:end]
+        start = end
+    files["new_words.json"] = []
+
+    for filename, entries in files.items():
+        data = {entry: {"word": entry, "definition": f"definition of {entry.lower()}"} for entry in entries}
+        with open(os.path.join(language_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return words, sorted(idioms)
+
+
+def response_queries(words, idioms, count, seed=0):
+    # The mix a chat session sends: known words, typos, idioms inside a
+    # sentence and text nothing in the lexicon matches.
+    rng = random.Random(seed)
+    queries = {"known": [], "typo": [], "idiom": [], "unknown": []}
+    for _ in range(count):
+        word = rng.choice(words)
+        queries["known"].append(word)
+        queries["typo"].append(misspell(word.lower(), 1, rng).title())
+        if idioms:
+            queries["idiom"].append(f"I heard that {rng.choice(idioms).lower()} yesterday")
+        queries["unknown"].append("".join(rng.choices("qxzjkv", k=len(word))).title())
+    return {kind: texts for kind, texts in queries.items() if texts}
+
+
+# Workers: run inside the scratch directory, print one RESULT line.
+
+def ingest_worker(args):
+    import asyncio
+
+    from database_utils import close_connection, get_connection
+    from language_data_to_sqlite import bulk_load
+    from modules import instrumentation
+
+    instrumentation.enable()
+
+    async def run():
+        start = time.perf_counter()
+        await get_connection()
+        try:
+            count = await bulk_load(workers=args.ingest_workers)
+        finally:
+            await close_connection()
+        return count, time.perf_counter() - start
+
+    count, seconds = asyncio.run(run())
+    stages = instrumentation.report()["stages"]
+    return {
+        "words": count,
+        "ingest_seconds": round(seconds, 3),
+        "ingest_words_per_second": round(count / seconds, 1),
+        "ingest_peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: stages[stage]["total_ms"] for stage in stages if stage.startswith(("ingest.", "nlp.", "db.write", "get_ipa"))},
+    }
+
+
+def respond_worker(args):
+    from database_utils import (
+        check_for_updates,
+        find_phrases,
+        generate_response,
+        load_word_data,
+        load_word_index,
+        warm_up,
+    )
+
+    with open(args.queries_path, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    # bulk_load fills the words table only; the scan records the file
+    # entries load_word_data serves, as a chat session's first turn would.
+    # Not part of the timed startup.
+    check_for_updates()
+
+    start = time.perf_counter()
+    word_data = load_word_data()
+    load_word_index()
+    warm_up()
+    startup = time.perf_counter() - start
+
+    # Every idiom query must be answered by the phrase stage, or the idiom
+    # timings would measure the similarity fallback instead.
+    unmatched = [text for text in queries.get("idiom", []) if not find_phrases(text)]
+    if unmatched:
+        raise RuntimeError(f"{len(unmatched)} idiom queries found no phrase, e.g. {unmatched[0]!r}")
+
+    result = {"respond_startup_seconds": round(startup, 3)}
+    all_samples = []
+    for kind, texts in queries.items():
+        samples = []
+        for text in texts:
+            start = time.perf_counter()
+            generate_response(text, word_data)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        all_samples.extend(samples)
+        result[f"respond_{kind}_p50_us"] = round(statistics.median(samples) * 1e6, 1)
+        result[f"respond_{kind}_p99_us"] = round(samples[int(len(samples) * 0.99)] * 1e6, 1)
+    result["respond_per_second"] = round(len(all_samples) / sum(all_samples), 1)
+    result["respond_peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def fetch_worker(args):
+    import asyncio
+
+    from benchmarks.fetch_definitions import run, sample_words
+    from benchmarks.stub_dictionary_server import start_stub_server, stub_sources
+    from modules.definition_cache import DefinitionCache
+
+    server, base_url = start_stub_server()
+    words = sample_words(args.fetch_words)
+    cache = DefinitionCache("definition_cache.db", ttl=3600, negative_ttl=60, max_entries=len(words) * 2)
+    result = {}
+    try:
+        for label in ("cold", "warm"):
+            _, elapsed, _ = asyncio.run(run(words, stub_sources(base_url), cache, args.fetch_concurrency, 0))
+            result[f"fetch_{label}_per_second"] = round(len(words) / elapsed, 1)
+    finally:
+        server.shutdown()
+    result["fetch_server_requests"] = server.request_count
+    return result
+
+
+WORKERS = {"ingest": ingest_worker, "respond": respond_worker, "fetch": fetch_worker}
+
+
+def run_worker(name, directory, *extra):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--worker", name, *extra],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    raise RuntimeError(f"{name} worker failed:\n{process.stdout[-2000:]}\n{process.stderr[-2000:]}")
+
+
+def run_size(size, args):
+    directory = tempfile.mkdtemp(prefix=f"space-ai-bench-{size}-")
+    try:
+        # A prebuilt pronunciation table saves every run a CMUdict download.
+        table = os.path.join(REPO_ROOT, PRONUNCIATION_TABLE_PATH)
+        if os.path.exists(table):
+            shutil.copy(table, directory)
+
+        words, idioms = write_vocabulary(directory, size, seed=args.seed)
+        queries_path = os.path.join(directory, "queries.json")
+        with open(queries_path, "w", encoding="utf-8") as f:
+            json.dump(response_queries(words, idioms, args.queries, seed=args.seed), f)
+
+        result = {"size": size}
+        result.update(run_worker("ingest", directory))
+        result.update(run_worker("respond", directory, "--queries-file", queries_path))
+        return result
+    finally:
+        if args.keep:
+            print(f"  kept {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results):
+    # {"size=1000 ingest_words_per_second": value, "fetch_cold_per_second": value, ...}
+    metrics = {}
+    for run in results["sizes"]:
+        for name, value in run.items():
+            if isinstance(value, (int, float)) and name not in ("size", "words"):
+                metrics[f"size={run['size']} {name}"] = value
+    for name, value in results.get("fetch", {}).items():
+        metrics[name] = value
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    # [(metric, baseline, current, change)] for metrics that got worse by
+    # more than `tolerance` (a fraction).
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, value in current.items():
+        old = previous.get(name)
+        if not old or value is None:
+            continue
+        change = (value - old) / old
+        metric = name.split()[-1]
+        if metric.endswith(HIGHER_IS_BETTER) and change < -tolerance:
+            regressions.append((name, old, value, change))
+        elif metric.endswith(LOWER_IS_BETTER) and change > tolerance:
+            regressions.append((name, old, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest, response and fetch benchmarks on synthetic vocabularies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200, help="generate_response calls per query kind")
+    parser.add_argument("--fetch-words", type=int, default=500)
+    parser.add_argument("--fetch-concurrency", type=int, default=10)
+    parser.add_argument("--skip-fetch", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json", help="where to write this run's results")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown before a metric is flagged")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directories")
+    parser.add_argument("--worker", choices=sorted(WORKERS), help=argparse.SUPPRESS)
+    parser.add_argument("--queries-file", dest="queries_path", help=argparse.SUPPRESS)
+    parser.add_argument("--ingest-workers", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(RESULT_PREFIX + json.dumps(WORKERS[args.worker](args)), flush=True)
+        return
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sizes": [],
+    }
+    for size in args.sizes:
+        print(f"{size} words")
+        run = run_size(size, args)
+        results["sizes"].append(run)
+        print(
+            f"  ingest {run['ingest_words_per_second']:>9.0f} words/s   peak RSS {run['ingest_peak_rss_mb']} MiB\n"
+            f"  respond {run['respond_per_second']:>8.0f} replies/s  known p50 {run['respond_known_p50_us']}us  "
+            f"typo p50 {run['respond_typo_p50_us']}us  unknown p50 {run['respond_unknown_p50_us']}us  "
+            f"peak RSS {run['respond_peak_rss_mb']} MiB"
+        )
+
+    if not args.skip_fetch:
+        directory = tempfile.mkdtemp(prefix="space-ai-bench-fetch-")
+        try:
+            results["fetch"] = run_worker(
+                "fetch", directory, "--fetch-words", str(args.fetch_words), "--fetch-concurrency", str(args.fetch_concurrency)
+            )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"fetch  {results['fetch']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old} -> {new} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
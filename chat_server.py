@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from config import METRICS_LOG_INTERVAL, REVERSE_LOOKUP_PREFIX, SERVER_HOST, SERVER_PORT, SERVER_REFRESH_INTERVAL
+from database_utils import (
+    analyze_words,
+    apply_word_delta,
+    check_for_updates,
+    close_connection,
+    compact_word_journal,
+    enable_metrics,
+    generate_response,
+    index_words,
+    learn_word,
+    load_word_data,
+    load_word_index,
+    preprocess_input,
+    reverse_lookup_response,
+    use_lexicon_bundle,
+    warm_up,
+)
+
+UNKNOWN_WORD_PROMPT = "I'm not familiar with the word '{}'. Could you please define it for me?"
+NO_REVERSE_MATCH = "No word I know is defined like that."
+
+
+class ChatServer:
+    # Line protocol over TCP: every line a client sends is one chat turn and
+    # gets exactly one line back. Replying to an unknown-word prompt teaches
+    # the bot that word, as in the REPL.
+    #
+    # All sessions share one word_data dict and the process-wide indexes.
+    # Replies are computed on a single responder thread, which is also the
+    # only thread that changes word_data or the indexes, so no reply ever
+    # sees them half-updated. Learned words and the periodic check for new
+    # language files go through one write queue drained by a writer thread,
+    # so slow writes never hold up replies. The spaCy pipeline is shared and
+    # not thread-safe, so the writer hands its word analysis to the
+    # responder too.
+
+    def __init__(self, refresh_interval=SERVER_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.word_data = {}
+        self.responder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-responder")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-writer")
+        self.writes = None
+        self.tasks = []
+        self.server = None
+        self.stats = {"sessions": 0, "active_sessions": 0, "turns": 0, "learned": 0}
+
+    async def respond(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.responder, func, *args)
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.word_data = await self.respond(load_word_data)
+        await self.respond(load_word_index)
+        await self.respond(warm_up)
+        self.writes = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._write_loop())]
+        if self.refresh_interval:
+            self.tasks.append(asyncio.create_task(self._refresh_loop()))
+        self.server = await asyncio.start_server(self.handle_session, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writes is not None:
+            await self.submit_write(compact_word_journal)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.responder.shutdown()
+        self.writer.shutdown()
+        await close_connection()
+
+    async def handle_session(self, reader, writer):
+        self.stats["sessions"] += 1
+        self.stats["active_sessions"] += 1
+        pending_word = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8", errors="replace").strip()
+                if not text:
+                    continue
+
+                if pending_word is not None:
+                    await self.submit_write(self._learn, pending_word, text)
+                    reply = f"'{pending_word}' added to the database."
+                    pending_word = None
+                elif text.startswith(REVERSE_LOOKUP_PREFIX):
+                    query = text[len(REVERSE_LOOKUP_PREFIX) :]
+                    response = await self.respond(reverse_lookup_response, query)
+                    reply = f"Bot: {response or NO_REVERSE_MATCH}"
+                else:
+                    processed_input = preprocess_input(text)
+                    if processed_input.lower() == "exit":
+                        break
+                    response = await self.respond(generate_response, processed_input, self.word_data)
+                    if response:
+                        reply = f"Bot: {response}"
+                    else:
+                        pending_word = processed_input
+                        reply = UNKNOWN_WORD_PROMPT.format(processed_input)
+
+                self.stats["turns"] += 1
+                writer.write(reply.replace("\n", " ").encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats["active_sessions"] -= 1
+            writer.close()
+
+    async def submit_write(self, func, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((func, args, future))
+        return await future
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            func, args, future = await self.writes.get()
+            try:
+                result = await loop.run_in_executor(self.writer, func, *args)
+            except Exception as e:
+                print(f"Error applying write: {e}")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def _learn(self, word, definition):
+        delta = learn_word(word, definition, index=False, analyze=self._analyze)
+        self._apply(delta, [word])
+        self.stats["learned"] += 1
+
+    def _refresh(self):
+        delta = check_for_updates(index=False, analyze=self._analyze)
+        if delta:
+            self._apply(delta)
+
+    def _analyze(self, words):
+        # Called on the writer thread; spaCy runs on the responder.
+        return self.responder.submit(analyze_words, words).result()
+
+    def _apply(self, delta, words=()):
+        # Called on the writer thread; the in-memory update itself runs on
+        # the responder between replies.
+        def apply():
+            apply_word_delta(self.word_data, delta)
+            index_words([*words, *delta.added, *delta.changed])
+
+        self.responder.submit(apply).result()
+
+    async def _refresh_loop(self):
+        # Replaces the REPL's per-turn check_for_updates.
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.submit_write(self._refresh)
+            except Exception:
+                # Already reported by _write_loop; try again next interval.
+                continue
+
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT, refresh_interval=SERVER_REFRESH_INTERVAL):
+    chat_server = ChatServer(refresh_interval)
+    server = await chat_server.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving chat sessions on {address[0]}:{address[1]}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await chat_server.close()
+        print(f"Server stats: {chat_server.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve chat sessions over a line-based TCP protocol")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="0 picks a free port")
+    parser.add_argument("--refresh-interval", type=float, default=SERVER_REFRESH_INTERVAL, help="seconds between checks for changed language files (0 disables)")
+    parser.add_argument("--metrics", action="store_true", help=f"log stage latencies every {METRICS_LOG_INTERVAL:g}s and write a JSON report on exit")
+    parser.add_argument("--profile", action="store_true", help="also sample stacks for a profile in the report (implies --metrics)")
+    parser.add_argument("--no-bundle", action="store_true", help="use the working database and indexes even if a lexicon bundle is built")
+    args = parser.parse_args()
+    if args.metrics or args.profile:
+        enable_metrics(log_interval=METRICS_LOG_INTERVAL, profile=args.profile)
+    if not args.no_bundle:
+        use_lexicon_bundle()
+    try:
+        asyncio.run(serve(args.host, args.port, args.refresh_interval))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,93 @@
+# Similarity search used by generate_response.
+SIMILARITY_THRESHOLD = 0.0
+SIMILARITY_TOP_K = 5
+
+# Reverse dictionary: a chat line starting with REVERSE_LOOKUP_PREFIX
+# ("? very rarely") lists the words whose definitions best match the rest.
+REVERSE_LOOKUP_PREFIX = "?"
+REVERSE_LOOKUP_LIMIT = 5
+
+# On-disk embedding index kept in sync with the words table.
+VECTOR_INDEX_PATH = "language_data.vectors"
+
+# spaCy pipeline loaded on first use by database_utils.get_nlp.
+SPACY_MODEL = "en_core_web_sm"
+
+# Spelling correction tried before similarity search in generate_response.
+# Short inputs get a tighter bound (one edit per four characters, at least one).
+FUZZY_MAX_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 7
+
+# Sorted, memory-mapped CMUdict IPA table built by
+# database_utils.build_pronunciations (or on first lookup if missing).
+PRONUNCIATION_TABLE_PATH = "pronunciations.ipa"
+
+# Prebuilt lexicon bundle (language_data_to_sqlite.py --build-bundle): the
+# database, word index, spelling and phrase indexes and pronunciation table
+# in one versioned directory. main.py and chat_server.py open it read-only
+# at startup instead of the working files whenever it was built from the
+# current language files.
+LEXICON_BUNDLE_PATH = "lexicon.bundle"
+
+# chat_server.py: line-based TCP chat sessions. Language files are checked
+# for changes every SERVER_REFRESH_INTERVAL seconds instead of every turn.
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5050
+SERVER_REFRESH_INTERVAL = 5.0
+
+# Words taught in the chat loop are appended to a JSON Lines journal and
+# folded into new_words.json and the database once it holds
+# WORD_JOURNAL_COMPACT_ENTRIES entries (and on exit).
+WORD_JOURNAL_PATH = "data/language/new_words.jsonl"
+WORD_JOURNAL_FSYNC_INTERVAL = 0.2
+WORD_JOURNAL_COMPACT_ENTRIES = 100
+
+# Hot-path latency histograms and counters (modules/instrumentation.py).
+# Off unless an entry point is run with --metrics or --profile; the report
+# is written to METRICS_REPORT_PATH on exit and the chat server also logs a
+# summary line every METRICS_LOG_INTERVAL seconds.
+METRICS_REPORT_PATH = "metrics.json"
+METRICS_LOG_INTERVAL = 60.0
+METRICS_PROFILE_INTERVAL = 0.005
+
+# SQLite connection pool: read-only WAL readers plus one writer thread that
+# commits up to DB_WRITE_BATCH queued write jobs per transaction.
+DB_READERS = 4
+DB_CACHE_SIZE_KB = 64 * 1024
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_WRITE_BATCH = 64
+
+# Word analysis (lemma, POS, tag, entity) shared by the loader and the chat
+# loop. Batches of at least ANALYSIS_PARALLEL_MIN_WORDS are spread over
+# ANALYSIS_PROCESSES workers (None = one per CPU).
+ANALYSIS_CACHE_PATH = "analysis_cache.db"
+ANALYSIS_BATCH_SIZE = 1000
+ANALYSIS_PROCESSES = None
+ANALYSIS_PARALLEL_MIN_WORDS = 10_000
+
+# Rows per transaction for the bulk loader in language_data_to_sqlite, and
+# how many written-but-uncommitted batches it lets queue up before it stops
+# reading input.
+INGEST_BATCH_SIZE = 5000
+INGEST_QUEUE_DEPTH = 2
+# Worker processes for the analysis, pronunciation and embedding stages of
+# the bulk loader (1 = run them in the loader itself, None = one per CPU).
+INGEST_WORKERS = 1
+
+# Persistent cache for get_definition_website1 / get_definition_website2.
+DEFINITION_CACHE_PATH = "definition_cache.db"
+DEFINITION_CACHE_TTL = 30 * 24 * 60 * 60
+DEFINITION_CACHE_NEGATIVE_TTL = 24 * 60 * 60
+DEFINITION_CACHE_MAX_ENTRIES = 100_000
+
+# Dictionary sources and the async fetcher used by get_definitions_concurrently.
+URBAN_DICTIONARY_URL = "https://www.urbandictionary.com/define.php?term={word}"
+OED_URL = "https://www.oed.com/search/dictionary/?scope=Entries&q={word}"
+DEFINITION_FETCH_RATE_PER_HOST = 2.0
+DEFINITION_FETCH_RETRIES = 3
+DEFINITION_FETCH_TIMEOUT = 10.0
+
+# Worker pool that parses fetched dictionary pages off the event loop
+# ("process" or "thread"; None workers = one per CPU).
+HTML_EXTRACT_POOL = "process"
+HTML_EXTRACT_WORKERS = None
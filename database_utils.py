@@ -1,132 +1,494 @@
 import json
 import string
-import aiosqlite
-import requests
-import spacy
 import os
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-import lxml.html as lhtml
-import pyphen
-from time import time
-from concurrent.futures import ThreadPoolExecutor
+import pickle
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from config import (
+    ANALYSIS_BATCH_SIZE,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_PARALLEL_MIN_WORDS,
+    ANALYSIS_PROCESSES,
+    DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE,
+    DB_READERS,
+    DB_WRITE_BATCH,
+    DEFINITION_CACHE_MAX_ENTRIES,
+    DEFINITION_CACHE_NEGATIVE_TTL,
+    DEFINITION_CACHE_PATH,
+    DEFINITION_CACHE_TTL,
+    DEFINITION_FETCH_RATE_PER_HOST,
+    DEFINITION_FETCH_RETRIES,
+    DEFINITION_FETCH_TIMEOUT,
+    FUZZY_MAX_DISTANCE,
+    FUZZY_PREFIX_LENGTH,
+    HTML_EXTRACT_POOL,
+    HTML_EXTRACT_WORKERS,
+    INGEST_BATCH_SIZE,
+    INGEST_QUEUE_DEPTH,
+    INGEST_WORKERS,
+    LEXICON_BUNDLE_PATH,
+    METRICS_PROFILE_INTERVAL,
+    METRICS_REPORT_PATH,
+    OED_URL,
+    PRONUNCIATION_TABLE_PATH,
+    REVERSE_LOOKUP_LIMIT,
+    URBAN_DICTIONARY_URL,
+    SIMILARITY_THRESHOLD,
+    SIMILARITY_TOP_K,
+    SPACY_MODEL,
+    VECTOR_INDEX_PATH,
+    WORD_JOURNAL_COMPACT_ENTRIES,
+    WORD_JOURNAL_FSYNC_INTERVAL,
+    WORD_JOURNAL_PATH,
+)
+from modules.analysis import AnalysisCache, WordAnalyzer
+from modules.bundle import LexiconBundle, write_bundle
+from modules.db_pool import ConnectionPool
+from modules.definition_cache import MISSING, DefinitionCache
+from modules import instrumentation
+from modules.instrumentation import timed
+from modules.journal import WordJournal
+from modules.lazy import lazy_singleton
+from modules.pronunciation import PronunciationTable, build_pronunciation_table
+from modules.ingest import (
+    analyze_batches,
+    batched,
+    iter_language_file,
+    iter_language_files,
+    normalize_entries,
+    parallel_batches,
+    skip_known,
+    word_rows,
+    write_batches,
+)
+from modules.lexicon import Lexicon
+from modules.manifest import (
+    WordDelta,
+    apply_language_scan,
+    create_manifest_tables,
+    iter_word_data,
+    manifest_words,
+    scan_language_files,
+)
+from modules.schema import (
+    SCHEMA_VERSION,
+    existing_words,
+    insert_words,
+    migrate,
+    pos_for_words,
+    search_definitions,
+    set_definitions,
+    word_rows_for,
+    words_without_definition,
+)
+
+# Heavy dependencies (spaCy, NLTK, Pyphen, aiohttp, requests, lxml, numpy) are
+# imported inside the functions that need them so that importing this module
+# and reaching the first prompt stays cheap.
 
 max_concurrent_requests = 10
-nlp = spacy.load("en_core_web_sm")
 db_filename = "language_data.db"
-definition_cache = {}
+data_dir = "data/language"
 
-async def create_connection_pool():
-    return await aiosqlite.connect(db_filename)
+# Names of the working files inside a lexicon bundle.
+BUNDLE_VECTOR_INDEX = os.path.basename(VECTOR_INDEX_PATH)
+BUNDLE_VECTOR_FILES = [BUNDLE_VECTOR_INDEX + suffix for suffix in (".npy", ".words", ".meta.json")]
+BUNDLE_PRONUNCIATIONS = os.path.basename(PRONUNCIATION_TABLE_PATH)
+BUNDLE_WORD_DATA = "word_data.pickle"
+BUNDLE_FUZZY_INDEX = "fuzzy_index.pickle"
+BUNDLE_PHRASE_MATCHER = "phrase_matcher.pickle"
 
-conn = asyncio.run(create_connection_pool())
-cursor = None
+# Set by use_lexicon_bundle; None means the working files are in use.
+lexicon_bundle = None
 
-async def create_tables():
-    async with conn.cursor() as cursor:
-        await cursor.executescript(
-            '''
-            CREATE TABLE IF NOT EXISTS words (
-                word_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT UNIQUE,
-                lemma TEXT,
-                ipa TEXT,
-                pos TEXT,
-                definition TEXT
-            );
-
-            -- create parts_of_speech table 
-            CREATE TABLE IF NOT EXISTS parts_of_speech(
-                pos_id INT PRIMARY KEY,
-                pos_type TEXT
-            );
-        ''')
-
-        parts_of_speech = ["Noun", "Pronoun", "Verb", "Adjective", "Adverb", "Preposition", "Conjunction", "Interjection"]
-        for pos in parts_of_speech:
-            await cursor.execute(
-                "INSERT OR IGNORE INTO parts_of_speech (pos_type) VALUES (?)",
-                (pos,),
-            )
+@lazy_singleton
+def get_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL)
 
-asyncio.run(create_tables())
+def spacy_model_id():
+    from importlib.metadata import PackageNotFoundError, version
 
-async def get_part_of_speech(conn, word):
-    async with conn.cursor() as cursor:
-        await cursor.execute("SELECT pos FROM words WHERE word = ?", (word,))
-        result = await cursor.fetchone()
+    try:
+        return f"{SPACY_MODEL}-{version(SPACY_MODEL)}"
+    except PackageNotFoundError:
+        return SPACY_MODEL
+
+@lazy_singleton
+def get_word_analyzer():
+    return WordAnalyzer(
+        get_nlp,
+        AnalysisCache(ANALYSIS_CACHE_PATH, model=spacy_model_id()),
+        n_process=ANALYSIS_PROCESSES,
+        batch_size=ANALYSIS_BATCH_SIZE,
+        parallel_min_words=ANALYSIS_PARALLEL_MIN_WORDS,
+    )
 
-    if result:
-        return result[0]
-    else:
-        doc = nlp(word)
-        return doc[0].pos_
+def word_analysis_stats():
+    return get_word_analyzer().stats()
+
+def enable_metrics(report_path=METRICS_REPORT_PATH, log_interval=None, profile=False):
+    # Off unless an entry point asks for it (--metrics / --profile).
+    def loaded_stats(singleton, stats):
+        return lambda: stats(singleton()) if singleton.loaded() else None
+
+    instrumentation.register_source("db_pool", loaded_stats(get_pool, lambda pool: dict(pool.stats)))
+    instrumentation.register_source("word_analysis", loaded_stats(get_word_analyzer, lambda analyzer: analyzer.stats()))
+    instrumentation.register_source("definition_cache", loaded_stats(get_definition_cache, lambda cache: cache.stats()))
+    instrumentation.register_source("word_journal", loaded_stats(get_word_journal, lambda journal: dict(journal.stats)))
+    instrumentation.enable(
+        report_path=report_path,
+        log_interval=log_interval,
+        profile_interval=METRICS_PROFILE_INTERVAL if profile else None,
+    )
 
-async def get_new_words_from_json():
-    new_words = set()
-    all_word_data = {}
-    processed_words = []
-    batch_size = 100
+def metrics_report():
+    return instrumentation.report()
 
-    for filename in os.listdir('data/language'):
-        if filename.endswith(".json"):
-            with open(os.path.join('data/language', filename), 'r') as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError as e:
-                    print(f"Error decoding JSON in file {filename}: {e}")
-                    continue
-                if isinstance(data, list):
-                    for word_dict in data:
-                        all_word_data.update(word_dict)
-                        new_words.update(word_dict.keys())
-                else:
-                    all_word_data.update(data)
-                    new_words.update(data.keys())
-
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(nlp.pipe, list(new_words)[i : i + batch_size]) for i in range(0, len(new_words), batch_size)]
-
-        for future in futures:
-            docs = future.result()
-            for doc in docs:
-                token = doc[0]
-                processed_words.append(
-                    {
-                        "word": token.text,
-                        "lemma": token.lemma_,
-                        "pos": token.pos_,
-                        "entity_type": token.ent_type_,
-                    }
-                )
-
-    for word_data in processed_words:
-        all_word_data[word_data["word"]] = word_data
-
-    return new_words, all_word_data
+def cmudict_entries():
+    import nltk
+    from nltk.corpus import cmudict
+    try:
+        nltk.data.find("corpora/cmudict")
+    except LookupError:
+        nltk.download("cmudict")
+    return cmudict.entries()
+
+def build_pronunciations(path=PRONUNCIATION_TABLE_PATH):
+    # ARPAbet to IPA happens here, once; lookups only read the table.
+    count = build_pronunciation_table(cmudict_entries(), path)
+    if get_pronunciation_table.loaded():
+        get_pronunciation_table().close()
+        get_pronunciation_table.reset()
+    return count
+
+@lazy_singleton
+def get_pronunciation_table():
+    if lexicon_bundle is not None:
+        path = lexicon_bundle.file(BUNDLE_PRONUNCIATIONS)
+        return PronunciationTable(path) if path else PronunciationTable()
+    if not os.path.exists(PRONUNCIATION_TABLE_PATH):
+        try:
+            build_pronunciation_table(cmudict_entries(), PRONUNCIATION_TABLE_PATH)
+        except Exception as e:
+            # Every word falls back to hyphenation until the table is built.
+            print(f"Could not build pronunciation table: {e}")
+            return PronunciationTable()
+    return PronunciationTable(PRONUNCIATION_TABLE_PATH)
+
+@lazy_singleton
+def get_hyphenator():
+    import pyphen
+    return pyphen.Pyphen(lang='en')
+
+@lazy_singleton
+def get_definition_cache():
+    return DefinitionCache(
+        DEFINITION_CACHE_PATH,
+        ttl=DEFINITION_CACHE_TTL,
+        negative_ttl=DEFINITION_CACHE_NEGATIVE_TTL,
+        max_entries=DEFINITION_CACHE_MAX_ENTRIES,
+    )
 
+def init_database(conn):
+    migrate(conn)
+    create_manifest_tables(conn)
+
+def create_connection_pool():
+    if lexicon_bundle is not None:
+        return ConnectionPool(
+            lexicon_bundle.file(os.path.basename(db_filename)),
+            readers=DB_READERS,
+            cache_size_kb=DB_CACHE_SIZE_KB,
+            mmap_size=DB_MMAP_SIZE,
+            read_only=True,
+        )
+    return ConnectionPool(
+        db_filename,
+        readers=DB_READERS,
+        cache_size_kb=DB_CACHE_SIZE_KB,
+        mmap_size=DB_MMAP_SIZE,
+        write_batch=DB_WRITE_BATCH,
+        init=init_database,
+    )
 
+@lazy_singleton
+def get_pool():
+    return create_connection_pool()
+
+async def get_connection():
+    # The pool serves async callers too; building it runs the migrations.
+    return await asyncio.to_thread(get_pool)
+
+def close_pool():
+    # Closing the last connection checkpoints the WAL into the database file
+    # and removes the -wal and -shm files.
+    if get_pool.loaded():
+        get_pool().close()
+        get_pool.reset()
+
+async def close_connection():
+    await asyncio.to_thread(close_pool)
+
+def use_lexicon_bundle(path=LEXICON_BUNDLE_PATH, verify=False):
+    # Serve the lexicon from a prebuilt bundle instead of the working files:
+    # no JSON scan, no analysis and no index builds before the first
+    # prompt. Skipped, with the reason printed, unless the bundle matches
+    # the current language files and spaCy model. verify=True also checks
+    # every file's checksum. Must run before anything opens the database.
+    global lexicon_bundle
+    if get_pool.loaded():
+        raise RuntimeError("use_lexicon_bundle must be called before the database is opened")
+    if not os.path.isdir(path):
+        return None
+    try:
+        bundle = LexiconBundle(path)
+        bundle.check(data_dir, model=spacy_model_id(), schema_version=SCHEMA_VERSION, full=verify)
+    except ValueError as e:
+        print(f"Not using lexicon bundle {path}: {e}")
+        return None
+    lexicon_bundle = bundle
+    print(f"Using lexicon bundle {path} (version {bundle.version}, {bundle.manifest.get('words')} words)")
+    return bundle
+
+@timed()
+def build_lexicon_bundle(path=LEXICON_BUNDLE_PATH):
+    # Bring the working files up to date with the language files, then copy
+    # everything a chat session would otherwise derive at startup into a
+    # bundle: a compacted copy of the database, the word index, the pickled
+    # word data and spelling and phrase indexes, and the pronunciation table.
+    if lexicon_bundle is not None:
+        raise RuntimeError("A lexicon bundle is in use; build from the working files")
+    compact_word_journal()
+    check_for_updates()
+    load_word_index()
+    get_pronunciation_table()
+
+    pool = get_pool()
+    # Sources as of the scan the database reflects, not as of now.
+    sources = dict(pool.fetchall("SELECT filename, sha256 FROM json_manifest WHERE sha256 IS NOT NULL"))
+    words = pool.fetchone("SELECT COUNT(*) FROM words")[0]
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as scratch:
+        database = os.path.join(scratch, os.path.basename(db_filename))
+        pool.read(lambda conn: conn.execute("VACUUM INTO ?", (database,)))
+        conn = sqlite3.connect(database)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("ANALYZE")
+        conn.close()
+
+        files = {os.path.basename(db_filename): database}
+        files.update((name, os.path.join(os.path.dirname(VECTOR_INDEX_PATH), name)) for name in BUNDLE_VECTOR_FILES)
+        if os.path.exists(PRONUNCIATION_TABLE_PATH):
+            files[BUNDLE_PRONUNCIATIONS] = PRONUNCIATION_TABLE_PATH
+        for name, value in (
+            (BUNDLE_WORD_DATA, pool.read(read_word_data)),
+            (BUNDLE_FUZZY_INDEX, get_fuzzy_index()),
+            (BUNDLE_PHRASE_MATCHER, get_phrase_matcher()),
+        ):
+            files[name] = os.path.join(scratch, name)
+            with open(files[name], "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return write_bundle(
+            path, files, sources, {"schema_version": SCHEMA_VERSION, "model": spacy_model_id(), "words": words}
+        )
+
+def warm_up():
+    get_nlp()
+    get_word_matcher()
+    get_fuzzy_index()
+    get_phrase_matcher()
+
+async def create_tables():
+    await get_connection()
+
+async def insert_words_async(conn, rows, source=None):
+    await conn.write_async(insert_words, rows, source)
+
+# Set-at-a-time lookups: one trip to a pool reader however many words are
+# asked about, chunked into IN (...) queries there. `conn` is the pool (what
+# get_connection returns).
+
+@timed("db.words_exist")
+def words_exist(words, conn=None):
+    # The subset of `words` already in the words table.
+    return (conn or get_pool()).read(existing_words, list(words))
+
+@timed("db.get_words")
+def get_words(words, conn=None):
+    # {word: (word_id, word, lemma, ipa, pos, definition)} for stored words.
+    return (conn or get_pool()).read(word_rows_for, list(words))
+
+@timed("db.get_pos_many")
+def get_pos_many(words, conn=None):
+    # {word: pos}: the stored POS, or spaCy's for words not in the table.
+    words = list(words)
+    stored = (conn or get_pool()).read(pos_for_words, words)
+    missing = [word for word in words if word not in stored]
+    analyses = get_word_analyzer().analyze_many(missing) if missing else {}
+    for word in missing:
+        stored[word] = analyses[word]["pos"] if word in analyses else None
+    return stored
+
+def lookup_part_of_speech(conn, word):
+    return get_pos_many([word], conn)[word]
+
+async def get_part_of_speech(conn, word):
+    return await asyncio.to_thread(lookup_part_of_speech, conn, word)
+
+@timed()
 async def get_existing_words_from_database(conn):
-    async with conn.cursor() as cursor:
-        await cursor.execute("SELECT word FROM words")
-        results = await cursor.fetchall()
+    results = await conn.fetchall_async("SELECT word FROM words")
     return set(result[0] for result in results)
 
+def language_rows(batches):
+    # analyze -> pronounce: the CPU-bound stages of ingest_language_files.
+    batches = analyze_batches(batches, lambda words: analyze_words(words, remember=False))
+    return word_rows(batches, get_ipa_many)
+
+def init_ingest_worker():
+    # Runs once in each ingest worker process. The workers already use
+    # every core, so the analyzer must not start processes of its own.
+    get_word_analyzer().n_process = 1
+    get_nlp()
+
+def ingest_shard(batch):
+    # One batch of (word, info) entries, in an ingest worker process:
+    # insert_words rows plus the words' vectors for the word index.
+    from modules.word_matcher import WordMatcher
+
+    rows = next(language_rows([batch]))
+    return rows, WordMatcher(get_nlp).embed([row[0] for row in rows])
+
+@timed("ingest.language_files")
+def ingest_language_files(
+    batch_size=INGEST_BATCH_SIZE, depth=INGEST_QUEUE_DEPTH, directory=data_dir, source="json", workers=INGEST_WORKERS
+):
+    # Stream every language file into the words table: parse -> normalize
+    # -> drop stored words -> analyze -> pronounce -> write, a batch at a
+    # time. Memory stays flat however large the files are.
+    #
+    # With more than one worker, analysis, pronunciation and embedding run
+    # in worker processes, each with its own spaCy model; this process only
+    # parses, filters and hands the finished rows to the pool's writer
+    # thread, the one connection that commits.
+    workers = workers or os.cpu_count() or 1
+    pool = get_pool()
+    batches = batched(normalize_entries(iter_language_files(directory)), batch_size)
+    batches = skip_known(batches, lambda words: words_exist(words, pool))
+    if workers == 1:
+        rows = language_rows(batches)
+        return write_batches(pool, rows, source, depth=depth, on_written=lambda written: index_words([row[0] for row in written]))
+
+    # Build the CMUdict table here rather than in every worker at once.
+    get_pronunciation_table()
+    # write_batches settles batches in the order it pulled them, so the
+    # vectors for each written batch are always at the front.
+    embedded = deque()
+
+    def sharded_rows():
+        for rows, vectors in parallel_batches(batches, ingest_shard, workers, initializer=init_ingest_worker):
+            embedded.append(vectors)
+            yield rows
+
+    def written(rows):
+        index_words([row[0] for row in rows], embedded.popleft())
+
+    stats = write_batches(pool, sharded_rows(), source, depth=depth, on_written=written)
+    stats["workers"] = workers
+    return stats
+
+@timed("nlp.analyze_words")
+def analyze_words(words, remember=True):
+    analyzed = get_word_analyzer().analyze_many(words, remember=remember)
+    return {
+        word: {"lemma": a["lemma"], "pos": a["pos"], "entity_type": a["entity_type"]}
+        for word, a in analyzed.items()
+    }
+
+def read_word_data(conn):
+    return Lexicon(iter_word_data(conn))
+
+@timed()
+def load_word_data():
+    if lexicon_bundle is not None:
+        word_data = lexicon_bundle.load(BUNDLE_WORD_DATA)
+    else:
+        word_data = get_pool().read(read_word_data)
+    learned = get_word_journal().words
+    analyzed = analyze_words([word for word in learned if word not in word_data])
+    for word, entry in learned.items():
+        word_data[word] = {**word_data.get(word, analyzed.get(word, {})), **entry}
+    return word_data
+
+@lazy_singleton
+def get_word_journal():
+    return WordJournal(WORD_JOURNAL_PATH, fsync_interval=WORD_JOURNAL_FSYNC_INTERVAL)
+
+def fold_learned_words(entries):
+    # Merge journal entries into new_words.json (written to a temporary file
+    # and renamed, so a crash leaves the old file intact) and the database.
+    filename = os.path.join(data_dir, "new_words.json")
+    try:
+        with open(filename, 'r') as f:
+            new_words = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading new words file: {e}")
+        new_words = {}
+    new_words.update(entries)
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(new_words, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+    if lexicon_bundle is not None:
+        # new_words.json alone; the bundle is stale from here on.
+        return
+    rows = [(word, entry.get('lemma'), entry.get('ipa'), "ADJECTIVE", entry.get('definition')) for word, entry in entries.items()]
+    get_pool().write(insert_words, rows, "user")
+    get_pool().write(set_definitions, {word: entry.get('definition') for word, entry in entries.items()}, "user")
+
+def compact_word_journal(background=False):
+    journal = get_word_journal()
+    if background:
+        threading.Thread(target=journal.compact, args=(fold_learned_words,), daemon=True).start()
+        return 0
+    return journal.compact(fold_learned_words)
+
+def get_word_delta(analyze=analyze_words):
+    if lexicon_bundle is not None:
+        # Checked against the language files when it was opened; later
+        # edits are picked up once the bundle is rebuilt.
+        return WordDelta()
+    # Files are read and words analyzed outside the writer, so other writes
+    # never wait on spaCy; only the resulting rows go through it.
+    pool = get_pool()
+    scan = pool.read(scan_language_files, data_dir)
+    if scan is None:
+        return WordDelta()
+    analyzed = analyze(scan.needs_analysis) if scan.needs_analysis else {}
+    return pool.write(apply_language_scan, scan, analyzed)
+
+def apply_word_delta(word_data, delta):
+    word_data.update(delta.added)
+    word_data.update(delta.changed)
+    for word in delta.removed:
+        word_data.pop(word, None)
+
 def tokenize_text(text):
-    doc = nlp(text)
+    doc = get_nlp()(text)
     tokens = [token.text for token in doc]
     return tokens
 
 def process_word(word):
-    doc = nlp(word)
-    token = doc[0]
-    return {
-        "word": token.text,
-        "lemma": token.lemma_,
-        "pos": token.pos_,
-        "entity_type": token.ent_type_,
-    }
+    return {"word": word, **analyze_words([word]).get(word, {})}
 
 def get_user_input(prompt):
     while True:
@@ -139,26 +501,128 @@ def get_user_input(prompt):
         except ValueError:
             print("Invalid input. Please try again.")
 
-def generate_response(input_text, word_data):
-    input_doc = nlp(input_text)
-
-    most_similar_word = None
-    highest_similarity = 0.0
-
-    for word, info in word_data.items(): 
-        word_doc = nlp(word)
-        similarity = input_doc.similarity(word_doc)
-
-        if similarity > highest_similarity:
-            highest_similarity = similarity
-            most_similar_word = word
-
-    if most_similar_word:
-        definition = word_data[most_similar_word].get("definition")
+@lazy_singleton
+def get_word_matcher():
+    from modules.vector_index import VectorIndex
+    from modules.word_matcher import WordMatcher
+
+    if lexicon_bundle is not None:
+        path = os.path.join(lexicon_bundle.path, BUNDLE_VECTOR_INDEX)
+        return WordMatcher(get_nlp, VectorIndex(path, model=spacy_model_id(), read_only=True))
+    return WordMatcher(get_nlp, VectorIndex(VECTOR_INDEX_PATH, model=spacy_model_id()))
+
+def load_word_index():
+    if lexicon_bundle is not None:
+        # Built from the bundled words table; only words learned since the
+        # bundle was built (journal entries not yet compacted) are missing.
+        get_word_matcher().add(get_word_journal().words)
+        return
+    words = [row[0] for row in get_pool().fetchall("SELECT word FROM words") if row[0]]
+    added, refreshed, removed = get_word_matcher().sync_words(words)
+    if added or refreshed or removed:
+        print(f"Word index: {added} added, {refreshed} rebuilt, {removed} removed")
+
+def index_words(words, vectors=None):
+    if get_fuzzy_index.loaded():
+        get_fuzzy_index().add_many(words)
+    if get_phrase_matcher.loaded():
+        get_phrase_matcher().add_many(words)
+    # With a lexicon bundle these land in the matcher's in-memory overlay.
+    try:
+        get_word_matcher().add(words, vectors)
+    except (OSError, ValueError) as e:
+        print(f"Error updating word index: {e}")
+
+def read_lexicon_words(conn):
+    return manifest_words(conn), [row[0] for row in conn.execute("SELECT word FROM words")]
+
+def lexicon_words():
+    # Every entry in the data/language files, the word journal and the words
+    # table, file spellings first so matches come back as word_data keys.
+    # Only the words are read; no entry is decoded.
+    file_words, table_words = get_pool().read(read_lexicon_words)
+    return [*file_words, *get_word_journal().words, *table_words]
+
+def load_bundled_index(name):
+    # A pickled index from the bundle plus the words learned since it was
+    # built, as the working-files build would include them.
+    index = lexicon_bundle.load(name)
+    index.add_many(get_word_journal().words)
+    return index
+
+@lazy_singleton
+def get_fuzzy_index():
+    from modules.fuzzy_index import FuzzyIndex
+
+    if lexicon_bundle is not None:
+        return load_bundled_index(BUNDLE_FUZZY_INDEX)
+    index = FuzzyIndex(max_distance=FUZZY_MAX_DISTANCE, prefix_length=FUZZY_PREFIX_LENGTH)
+    index.add_many(lexicon_words())
+    return index
+
+@lazy_singleton
+def get_phrase_matcher():
+    from modules.phrase_matcher import PhraseMatcher
+
+    if lexicon_bundle is not None:
+        return load_bundled_index(BUNDLE_PHRASE_MATCHER)
+    matcher = PhraseMatcher()
+    matcher.add_many(lexicon_words())
+    return matcher
+
+@timed()
+def find_phrases(text):
+    return [phrase for _, _, phrase in get_phrase_matcher().find(text)]
+
+@timed()
+def suggest_corrections(text, limit=5):
+    max_distance = min(FUZZY_MAX_DISTANCE, max(1, len(text) // 4))
+    return get_fuzzy_index().lookup(text, limit=limit, max_distance=max_distance)
+
+@timed()
+def find_similar_words(input_text, k=SIMILARITY_TOP_K, threshold=SIMILARITY_THRESHOLD):
+    # Words reach the index when they are stored (load_word_index at startup,
+    # index_words as deltas are applied), not here on every turn.
+    return get_word_matcher().top_k(input_text, k=k, threshold=threshold)
+
+@timed()
+def generate_response(input_text, word_data, threshold=SIMILARITY_THRESHOLD):
+    # Known words and near-misses are answered by spelling correction;
+    # anything else falls through to similarity search.
+    matches = suggest_corrections(input_text, limit=1)
+    if not matches:
+        # Idioms, slang and words that appear inside a longer sentence.
+        defined = [
+            (phrase, word_data[phrase]["definition"])
+            for phrase in find_phrases(input_text)
+            if (word_data.get(phrase) or {}).get("definition")
+        ]
+        if defined:
+            return "; ".join(f"{phrase}: {definition}" for phrase, definition in defined)
+        matches = find_similar_words(input_text, k=1, threshold=threshold)
+
+    if matches:
+        most_similar_word, _ = matches[0]
+        definition = (word_data.get(most_similar_word) or {}).get("definition")
         return f"{most_similar_word}: {definition}"
     else:
         return None
 
+@timed()
+def reverse_lookup(text, limit=REVERSE_LOOKUP_LIMIT):
+    # [(word, definition, score)] for the words whose definitions or
+    # examples best match `text`, from the word_search FTS5 index.
+    return get_pool().read(search_definitions, text, limit)
+
+def reverse_lookup_response(text, limit=REVERSE_LOOKUP_LIMIT):
+    matches = reverse_lookup(text, limit)
+    if not matches:
+        return None
+    return "; ".join(f"{word}: {definition}" if definition else word for word, definition, _ in matches)
+
+def definition_cache_stats():
+    return get_definition_cache().stats()
+
 def print_response(response):
     print("Bot:", response)
 
@@ -166,42 +630,55 @@ def write_new_words_to_json(words, filename="data/language/new_words.json"):
     with open(filename, 'w') as f:
         json.dump(list(words), f, indent=4)
 
-def check_for_updates():
-    new_words, all_word_data = get_new_words_from_json()
-    existing_words = get_existing_words_from_database()
+@timed()
+def check_for_updates(delta=None, index=True, analyze=analyze_words):
+    if delta is None:
+        delta = get_word_delta(analyze)
+    all_word_data = {**delta.added, **delta.changed}
+    if not all_word_data:
+        return delta
 
-    words_to_insert = new_words - existing_words  
+    words_to_insert = set(all_word_data) - words_exist(all_word_data)
 
+    pronunciations = get_ipa_many(words_to_insert)
+    rows = []
     for word in words_to_insert:
         word_data = all_word_data[word]  
-        pos_tag = word_data.get("pos", "ADJECTIVE")  
-        insert_word(word, word_data['lemma'], get_ipa(word), pos_tag)
-
-    conn.commit()
-
-def insert_word(word, lemma, ipa, pos="ADJECTIVE"):  
-    table_name = pos.lower() + "s"
-
-    cursor.execute(f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            word_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word TEXT UNIQUE,
-            lemma TEXT,
-            ipa TEXT,
-            definition TEXT
-        )
-    """)
-
-    cursor.execute(
-        f"""
-        INSERT INTO {table_name} (word, lemma, ipa, definition)
-        VALUES (?, ?, ?, NULL)  -- Definition can be added later
-        """,
-        (word, lemma, ipa),
-    )
+        pos_tag = word_data.get("pos") or "ADJECTIVE"  
+        rows.append((word, word_data.get('lemma'), pronunciations[word], pos_tag, word_data.get('definition') or None))
+
+    get_pool().write(insert_words, rows)
+    # Words already stored keep their row; bring their definition in line
+    # with the file (set_definitions leaves words without one alone).
+    stored = {word: all_word_data[word].get('definition') for word in set(all_word_data) - words_to_insert}
+    if stored:
+        get_pool().write(set_definitions, stored)
+    if index:
+        index_words(words_to_insert)
+    return delta
+
+def insert_word(word, lemma, ipa, pos="ADJECTIVE", index=True, definition=None):
+    # With a lexicon bundle the word journal is the only record until the
+    # journal is compacted into new_words.json.
+    if lexicon_bundle is None:
+        get_pool().write(insert_words, [(word, lemma, ipa, pos, definition)], "user" if definition else None)
+
+    if index:
+        index_words([word])
 
 def handle_unknown_word(word):
     definition = get_user_input("I'm not familiar with the word '{}'. Could you please define it for me? ".format(word))
+    delta = learn_word(word, definition)
+    print(f"'{word}' added to the database.")
+    return delta
+
+@timed()
+def learn_word(word, definition, index=True, analyze=analyze_words):
+    # Record a user-supplied definition in the word journal and the database
+    # and return it as a delta, without rescanning the language files.
+    # With index=False the caller updates the in-memory indexes itself.
+    # `analyze` (like analyze_words) lets a caller choose the thread spaCy
+    # runs on.
     ipa = get_ipa(word)
     new_word_data = {
         "word": word,
@@ -209,27 +686,15 @@ def handle_unknown_word(word):
         "lemma": word,
         "ipa": ipa
     }
-    doc = nlp(word)
-    lemma = doc[0].lemma_
+    analysis = analyze([word]).get(word, {})
+    lemma = analysis.get("lemma") or word
 
-    try:
-        with open('data/language/new_words.json', 'r') as f:
-            new_words = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading new words file: {e}")
-        new_words = {}
-
-    new_words[word] = new_word_data
-
-    try:
-        with open('data/language/new_words.json', 'w') as f:
-            json.dump(new_words, f, indent=4)
-    except (IOError, json.JSONDecodeError) as e:  
-        print(f"Error saving new words file: {e}")
-
-    insert_word(word, lemma, ipa)
-    check_for_updates()
-    print(f"'{word}' added to the database.")
+    journal = get_word_journal()
+    journal.append(new_word_data)
+    insert_word(word, lemma, ipa, index=index, definition=definition)
+    if len(journal) >= WORD_JOURNAL_COMPACT_ENTRIES:
+        compact_word_journal(background=True)
+    return WordDelta(added={word: {**new_word_data, **analysis, "word": word}})
 
 def handle_user_input(user_input):
     processed_input = preprocess_input(user_input)
@@ -247,18 +712,28 @@ def preprocess_input(user_input):
     clean_input = user_input.lower().title()
     return clean_input.translate(translator)
 
+@timed()
+def get_ipa_many(words):
+    # {word: ipa} from the CMUdict table; words it does not know get their
+    # hyphenation instead.
+    words = list(words)
+    pronunciations = get_pronunciation_table().get_many(words)
+    missing = [word for word in words if word not in pronunciations]
+    if missing:
+        hyphenator = get_hyphenator()
+        for word in missing:
+            try:
+                pronunciations[word] = hyphenator.inserted(word)
+            except Exception as e:
+                print(f"IPA retrieval error for '{word}': {e}")
+                pronunciations[word] = None
+    return pronunciations
+
 def get_ipa(word):
-    try:
-        hyphenated = pyphen.Pyphen(lang='en')
-        return hyphenated.inserted(word)
-    except Exception as e:
-        print(f"IPA retrieval error for '{word}': {e}")
-        return None
+    return get_ipa_many([word])[word]
 
 async def word_exists_in_database(conn, word):
-    async with conn.execute("SELECT EXISTS(SELECT 1 FROM words WHERE word = ?)", (word,)) as cursor:
-        result = await cursor.fetchone()
-        return bool(result[0])
+    return word in await conn.read_async(existing_words, [word])
 
 def get_definitions(word):
     definitions = []
@@ -273,54 +748,15 @@ def get_definitions(word):
     return definitions
 
 async def insert_word_async(conn, word, lemma, ipa, pos="ADJECTIVE"):
-    table_name = pos.lower() + "s"
-
-    # Create table if it doesn't exist
-    async with conn.cursor() as cursor:
-        await cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                word_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT UNIQUE,
-                lemma TEXT,
-                ipa TEXT,
-                definition TEXT
-            )
-            """
-        )
-
-        await cursor.execute(
-            """
-            INSERT INTO words (word, lemma, ipa, pos, definition)
-            VALUES (?, ?, ?, ?, NULL)  -- Definition can be added later
-            """,
-            (word, lemma, ipa, pos),
-        )
-
-        await cursor.execute(f"SELECT 1 FROM {table_name} WHERE word = ?", (word,))
-        if not await cursor.fetchone():  # If the word doesn't exist, insert it
-            await cursor.execute(
-                f"""
-                INSERT INTO {table_name} (word, lemma, ipa, definition) 
-                VALUES (?, ?, ?, NULL)  
-                """,
-                (word, lemma, ipa),
-            )
-
-def word_exists_in_database(conn, word): 
-    cursor = conn.cursor()
-    cursor.execute("SELECT EXISTS(SELECT 1 FROM words WHERE word = ?)", (word,))
-    result = cursor.fetchone()
-    return bool(result[0])
+    await insert_words_async(conn, [(word, lemma, ipa, pos, None)])
 
 def insert_or_update_word(conn, word_data):
     word = word_data['word']
-    part_of_speech = get_part_of_speech(conn, word)  
+    part_of_speech = lookup_part_of_speech(conn, word)  
 
-    cursor.execute(
+    existing_definitions = conn.fetchall(
         "SELECT definition FROM words WHERE word = ?", (word,)
     )
-    existing_definitions = cursor.fetchall()
 
     if existing_definitions:
         definitions = [d[0] for d in existing_definitions if d[0] is not None]  
@@ -330,193 +766,127 @@ def insert_or_update_word(conn, word_data):
             definition_to_insert = ", ".join(new_definitions)
         else:
             definition_to_insert = ", ".join(definitions)
-        cursor.execute(
-            "UPDATE words SET definition = ? WHERE word = ?",
-            (definition_to_insert, word)
-        )
+        conn.write(set_definitions, {word: definition_to_insert})
     else:
         new_definitions = get_definitions(word)
         definition_to_insert = ", ".join(new_definitions) if new_definitions else None
-        cursor.execute(
-            """
-            INSERT INTO words (word, lemma, ipa, pos, definition)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (word, word_data.get('lemma'), get_ipa(word), part_of_speech, definition_to_insert),
-        )
-    conn.commit()  
-
-async def fetch_definition(session, word, url_func):
-    if word in definition_cache:
-        print(f"Using cached definition for '{word}'")
-        return definition_cache[word]
-
-    try:
-        async with session.get(url_func(word)) as response:
-            if response.status == 200:
-                content = await response.text()
-                if "urbandictionary" in url_func(word):
-                    definition = get_definition_website1(word, content)
-                else:
-                    definition = get_definition_website2(word, content)
-
-                if definition:
-                    definition_cache[word] = definition
-                return definition
-            else:
-                return None
-    except aiohttp.ClientError as e:
-        print(f"Error fetching definition for '{word}': {e}")
-        return None
-
-async def get_definitions_concurrently(words):
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for word in words:
-            task1 = asyncio.create_task(fetch_definition(session, word, get_definition_website1))
-            task2 = asyncio.create_task(fetch_definition(session, word, get_definition_website2))
-            tasks.extend([task1, task2])
-        results = await asyncio.gather(*tasks)
-        definitions = {}
-        for word, (def1, def2) in zip(words, results):
-            definitions[word] = def1 or def2  #
-        return definitions
-
-async def process_file(filename, all_word_data):
-    tasks = []
-    words_to_insert = []
-    with open(os.path.join('data/language', filename), 'r') as f:
-        data = json.load(f)
-        for word, word_info in data.items():
-            if not await word_exists_in_database(conn, word):
-                word_data = {
-                    "word": word,
-                    "definition": word_info.get("definition")
-                }
-                if word_data["definition"] is None:
-                    words_to_insert.append(word)  
-                else:
-                    tasks.append(
-                        asyncio.create_task(insert_or_update_word_async(conn, word_data))
-                    )
-    await asyncio.gather(*tasks)
+        conn.write(insert_words, [(word, word_data.get('lemma'), get_ipa(word), part_of_speech, definition_to_insert)])
+
+def create_extractor_pool():
+    from modules.html_extract import ExtractorPool
+    return ExtractorPool(HTML_EXTRACT_POOL, workers=HTML_EXTRACT_WORKERS)
+
+def definition_sources():
+    from modules.definition_fetcher import DefinitionSource
+    from modules.html_extract import extract_oed_definition, extract_urban_definition
+
+    return [
+        DefinitionSource("urbandictionary", URBAN_DICTIONARY_URL, extract_urban_definition),
+        DefinitionSource("oed", OED_URL, extract_oed_definition),
+    ]
+
+def create_definition_fetcher(sources=None, cache=None):
+    from modules.definition_fetcher import DefinitionFetcher
+
+    return DefinitionFetcher(
+        sources or definition_sources(),
+        max_concurrency=max_concurrent_requests,
+        per_host_rate=DEFINITION_FETCH_RATE_PER_HOST,
+        retries=DEFINITION_FETCH_RETRIES,
+        timeout=DEFINITION_FETCH_TIMEOUT,
+        cache=cache if cache is not None else get_definition_cache(),
+        extractor_pool=create_extractor_pool(),
+    )
 
+@timed("http.get_definitions_concurrently")
+async def get_definitions_concurrently(words, sources=None):
+    async with create_definition_fetcher(sources) as fetcher:
+        return await fetcher.fetch_definitions(words)
+
+async def process_file(filename, conn, batch_size=INGEST_BATCH_SIZE):
+    # Insert the file's entries the words table does not have yet. Each
+    # batch of entries is diffed against the table in a single lookup.
+    entries = normalize_entries(iter_language_file(os.path.join(data_dir, filename)))
+    for batch in batched(entries, batch_size):
+        known = await conn.read_async(existing_words, [word for word, _ in batch])
+        new_words = [word for word in dict(batch) if word not in known]
+        if new_words:
+            await insert_new_words_async(conn, new_words)
+
+@timed()
 def add_new_words_to_database(all_word_data):
-    start_time = time()
-    filename = "data/language/new_words.json"
-    with open(filename, 'r') as f:
-        new_words = json.load(f)
-
-    for word in new_words:
+    filename = os.path.join(data_dir, "new_words.json")
+    for word, _ in iter_language_file(filename):
         data = all_word_data.get(word)
-        insert_or_update_word(conn, data)
+        insert_or_update_word(get_pool(), data)
         print(f"Added/updated word: {word}")
 
-    end_time = time()
-    print(f"Finished adding new words in {end_time - start_time:.2f} seconds")
-
-async def add_other_json_files(all_word_data):
+async def add_other_json_files(all_word_data=None):
     tasks = []
-    words_to_insert = []
-    batch_size = 1000
+    conn = await get_connection()
     for filename in os.listdir('data/language'):
         if filename.endswith(".json") and filename != "new_words.json":
             tasks.append(
-                asyncio.create_task(process_file(filename, all_word_data, conn, words_to_insert)) 
+                asyncio.create_task(process_file(filename, conn))
             )
     await asyncio.gather(*tasks)  
 
-    if words_to_insert:
-        definitions = await get_definitions_concurrently(words_to_insert)
-        async with conn.execute("begin"):  
-            for word, definition in definitions.items():
-                if definition:  
-                    await conn.execute(
-                        "UPDATE words SET definition = ? WHERE word = ?",
-                        (definition, word),
-                    )
-            await conn.commit()
-
-async def insert_or_update_word_async(conn, word_data):
-    word = word_data['word']
-    part_of_speech = await get_part_of_speech(conn, word)
-    table_name = part_of_speech.lower() + "s"
-
-    async with conn.cursor() as cursor:
-        await cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                word_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT UNIQUE,
-                lemma TEXT,
-                ipa TEXT,
-                definition TEXT
-            )
-            """
-        )
-
-        await cursor.execute(
-            """
-            INSERT INTO words (word, lemma, ipa, pos, definition)
-            VALUES (?, ?, ?, ?, NULL)
-            """,
-            (word, word_data.get('lemma'), get_ipa(word), part_of_speech),
-        )
-
-        await cursor.execute(f"SELECT 1 FROM {table_name} WHERE word = ?", (word,))
-        if not await cursor.fetchone():  
-            await cursor.execute(
-                f"""
-                INSERT INTO {table_name} (word, lemma, ipa, definition) 
-                VALUES (?, ?, ?, NULL)  
-                """,
-                (word, word_data.get('lemma'), get_ipa(word)),
-            )
+    # bulk_load has normally stored every entry already, so the words still
+    # to define come from the table, not from the files: one concurrent
+    # fetch for every stored word without a definition.
+    undefined = await conn.read_async(words_without_definition)
+    if undefined:
+        definitions = await get_definitions_concurrently(undefined)
+        await conn.write_async(set_definitions, definitions)
+
+async def insert_new_words_async(conn, words):
+    parts_of_speech = await asyncio.to_thread(get_pos_many, words, conn)
+    pronunciations = await asyncio.to_thread(get_ipa_many, words)
+    await insert_words_async(conn, [(word, None, pronunciations[word], parts_of_speech[word], None) for word in words])
+
+    index_words(words)
+
+@timed()
+def cached_definition(word, source, scrape):
+    # Request errors propagate without being cached; a page that simply has
+    # no definition is cached as a negative result.
+    cache = get_definition_cache()
+    value = cache.get(word, source)
+    if value is MISSING:
+        value = scrape(word)
+        cache.set(word, source, value)
+    return value
 
 def get_definition_website1(word):
-    try:
-        url = f"https://www.urbandictionary.com/define.php?term={word}"
-        response = requests.get(url)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        try:
-            definition_div = soup.find('div', attrs={'class': 'meaning'})
-            if definition_div:
-                definition = definition_div.text.strip()
-            else:
-                definition = None
-
-            example_div = soup.find('div', attrs={'class': 'example'})
-            if example_div:
-                example = example_div.text.strip()
-            else:
-                example = None
+    import requests
 
-            return definition, example
-
-        except AttributeError:
-            return None, None
+    try:
+        definition, example = cached_definition(word, "urbandictionary", scrape_definition_website1)
+        return definition, example
 
     except requests.exceptions.RequestException as e:
         print(f"Error occurred while making the request: {str(e)}")
         return None, None
 
-def get_definition_website2(word):
-    url = f"https://www.oed.com/search/dictionary/?scope=Entries&q={word}"
+def scrape_definition_website1(word):
+    import requests
+    from modules.html_extract import extract_urban_definition
+    from urllib.parse import quote_plus
+
+    url = URBAN_DICTIONARY_URL.format(word=quote_plus(word))
     response = requests.get(url)
     response.raise_for_status()
+    return extract_urban_definition(response.content)
 
-    try:
-        html_tree = lhtml.fromstring(response.content)
-        first_definition = html_tree.xpath("//div[@class='resultsSetItem'][1]//div[@class='snippet']/text()")[0].strip()
-        return first_definition
+def get_definition_website2(word):
+    return cached_definition(word, "oed", scrape_definition_website2)
 
-    except (IndexError, AttributeError):
-        return None
+def scrape_definition_website2(word):
+    import requests
+    from modules.html_extract import extract_oed_definition
+    from urllib.parse import quote_plus
 
-async def word_exists_in_database(conn, word):
-    async with conn.execute("SELECT EXISTS(SELECT 1 FROM words WHERE word = ?)", (word,)) as cursor:
-        result = await cursor.fetchone()
-        return bool(result[0])
\ No newline at end of file
+    url = OED_URL.format(word=quote_plus(word))
+    response = requests.get(url)
+    response.raise_for_status()
+    return extract_oed_definition(response.content)
@@ -1,44 +1,73 @@
+import argparse
 import asyncio
 import time
-import cProfile
+from config import INGEST_BATCH_SIZE, INGEST_QUEUE_DEPTH, INGEST_WORKERS, LEXICON_BUNDLE_PATH
 from database_utils import (
-    get_new_words_from_json,
-    insert_or_update_word_async,  
+    build_lexicon_bundle,
+    build_pronunciations,
     add_other_json_files,
-    get_existing_words_from_database,
-    create_connection_pool,
+    get_connection,
+    close_connection,
     create_tables,
+    ingest_language_files,
+    definition_cache_stats,
+    enable_metrics,
+    word_analysis_stats,
 )
+from modules.instrumentation import timed
 db_filename = "language_data.db"
-conn = asyncio.run(create_connection_pool())
 
-async def main():
-    start_time = time.time()
-    new_words, all_word_data = await get_new_words_from_json()
-    existing_words = await get_existing_words_from_database(conn)
-    words_to_insert = new_words - existing_words
-
-    print(f"Loaded {len(new_words)} new words from JSON in {time.time() - start_time:.2f} seconds")
-    if words_to_insert:
-        tasks = []
-        for word in words_to_insert:
-            data = all_word_data.get(word)
-            tasks.append(asyncio.create_task(insert_or_update_word_async(conn, data)))
+@timed("ingest.bulk_load")
+async def bulk_load(batch_size=INGEST_BATCH_SIZE, queue_depth=INGEST_QUEUE_DEPTH, workers=INGEST_WORKERS):
+    # Parsing runs on a worker thread, analysis there too or in `workers`
+    # processes; the pool's writer thread commits batches behind it.
+    stats = await asyncio.to_thread(ingest_language_files, batch_size, queue_depth, workers=workers)
+    seconds = max(stats["seconds"], 1e-9)
+    print(
+        f"Bulk loaded {stats['rows']} new rows in {stats['seconds']:.2f} seconds "
+        f"({stats['rows'] / seconds:.0f} rows/s, {stats['batches']} batches of up to {batch_size}, "
+        f"{stats.get('workers', 1)} worker processes)"
+    )
+    return stats["rows"]
 
-        await asyncio.gather(*tasks)  
-        conn.commit()
+async def main(batch_size=INGEST_BATCH_SIZE, queue_depth=INGEST_QUEUE_DEPTH, workers=INGEST_WORKERS, bundle_path=None):
+    start_time = time.time()
+    await get_connection()
+    try:
+        await bulk_load(batch_size, queue_depth, workers)
+        print(f"Word analysis: {word_analysis_stats()}")
 
+        await add_other_json_files()
+        print("All done! Database populated successfully.")
+        print(f"Definition cache: {definition_cache_stats()}")
 
-    await add_other_json_files(all_word_data)
-    print("All done! Database populated successfully.")
+        if bundle_path:
+            manifest = await asyncio.to_thread(build_lexicon_bundle, bundle_path)
+            size = sum(entry["size"] for entry in manifest["files"].values())
+            print(f"Built lexicon bundle {bundle_path} version {manifest['version']} ({manifest['words']} words, {size / 2**20:.1f} MiB)")
+    finally:
+        await close_connection()
 
     end_time = time.time()
     print(f"Total time: {end_time - start_time:.2f} seconds")
 
 
 if __name__ == "__main__":
-    asyncio.run(create_tables())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="rows written per transaction")
+    parser.add_argument("--queue-depth", type=int, default=INGEST_QUEUE_DEPTH, help="written batches allowed to wait for a commit")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="processes analyzing words (0 = one per CPU)")
+    parser.add_argument("--build-bundle", nargs="?", const=LEXICON_BUNDLE_PATH, metavar="PATH", help=f"then write a prebuilt lexicon bundle for main.py (default {LEXICON_BUNDLE_PATH})")
+    parser.add_argument("--rebuild-pronunciations", action="store_true", help="rebuild the CMUdict IPA table before loading")
+    parser.add_argument("--metrics", action="store_true", help="record stage latencies and write a JSON report on exit")
+    parser.add_argument("--profile", action="store_true", help="also sample stacks for a profile in the report (implies --metrics)")
+    args = parser.parse_args()
 
-    cProfile.run("asyncio.run(main())", sort="tottime")
-    cProfile.run("asyncio.run(add_other_json_files(all_word_data))", sort="tottime")
-    cProfile.run("add_new_words_to_database(all_word_data)", sort="tottime")
\ No newline at end of file
+    if args.metrics or args.profile:
+        enable_metrics(profile=args.profile)
+
+    if args.rebuild_pronunciations:
+        print(f"Built pronunciation table with {build_pronunciations()} words")
+
+    asyncio.run(create_tables())
+    asyncio.run(main(args.batch_size, args.queue_depth, args.workers, args.build_bundle))
@@ -1,51 +1,72 @@
-import spacy
-from nltk.corpus import cmudict
-import nltk
+import argparse
+import threading
 import time
 
+from config import REVERSE_LOOKUP_PREFIX
 from database_utils import (
     get_user_input,
     preprocess_input,
     generate_response,
     print_response,
+    reverse_lookup_response,
+    use_lexicon_bundle,
     handle_unknown_word,
     check_for_updates,
-    get_existing_words_from_database,
-    get_new_words_from_json
+    close_pool,
+    compact_word_journal,
+    enable_metrics,
+    apply_word_delta,
+    load_word_data,
+    load_word_index,
+    warm_up
 )
 
-nltk.download('cmudict')  
-
-d = cmudict.dict()
-
 DATA_DIR = "data/language"
-nlp = spacy.load('en_core_web_sm')
 new_words = []
 last_update_time = time.time()
 
-def main():
+def main(preload=False, bundle=True):
+
+    if bundle:
+        use_lexicon_bundle()
+    if preload:
+        threading.Thread(target=warm_up, daemon=True).start()
 
-    word_data = {}  
+    try:
+        word_data = load_word_data()
+        load_word_index()
 
-    while True:
-        user_input = get_user_input(prompt="You: ")
-        processed_input = preprocess_input(user_input)
+        while True:
+            user_input = get_user_input(prompt="You: ")
+            if user_input.startswith(REVERSE_LOOKUP_PREFIX):
+                query = user_input[len(REVERSE_LOOKUP_PREFIX) :]
+                print_response(reverse_lookup_response(query) or "No word I know is defined like that.")
+                continue
 
-        if processed_input.lower() == "exit":
-            break
+            processed_input = preprocess_input(user_input)
 
-        new_words, all_word_data = get_new_words_from_json()
-        existing_words = get_existing_words_from_database()
-        word_data.update(all_word_data)
+            if processed_input.lower() == "exit":
+                compact_word_journal()
+                break
 
-        response = generate_response(processed_input, word_data)
+            apply_word_delta(word_data, check_for_updates())
 
-        if response:
-            print_response(response)
-        else:
-            handle_unknown_word(processed_input)
+            response = generate_response(processed_input, word_data)
 
-        check_for_updates() 
+            if response:
+                print_response(response)
+            else:
+                apply_word_delta(word_data, handle_unknown_word(processed_input))
+    finally:
+        close_pool()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preload", action="store_true", help="load the spaCy model in the background while waiting for the first input")
+    parser.add_argument("--metrics", action="store_true", help="record stage latencies and write a JSON report on exit")
+    parser.add_argument("--profile", action="store_true", help="also sample stacks for a profile in the report (implies --metrics)")
+    parser.add_argument("--no-bundle", action="store_true", help="use the working database and indexes even if a lexicon bundle is built")
+    args = parser.parse_args()
+    if args.metrics or args.profile:
+        enable_metrics(profile=args.profile)
+    main(preload=args.preload, bundle=not args.no_bundle)
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+
+from modules.instrumentation import count, span
+
+# Components that produce lemma, POS, fine-grained tag and entity type.
+# Anything else in the pipeline (parser, senter, textcat, ...) is disabled
+# while analyzing words.
+ANALYSIS_PIPES = {"tok2vec", "transformer", "tagger", "morphologizer", "attribute_ruler", "lemmatizer", "ner"}
+ANALYSIS_KEYS = ("lemma", "pos", "tag", "entity_type")
+
+
+class AnalysisCache:
+    # Persistent word -> (lemma, pos, tag, entity_type) store. Rows remember
+    # the model that produced them, so upgrading spaCy re-analyzes words
+    # instead of serving stale tags.
+
+    def __init__(self, path, model):
+        self.path = path
+        self.model = model
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS word_analysis (
+                word TEXT PRIMARY KEY,
+                model TEXT,
+                lemma TEXT,
+                pos TEXT,
+                tag TEXT,
+                entity_type TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, words):
+        found = {}
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for i in range(0, len(words), 500):
+                chunk = words[i : i + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT word, lemma, pos, tag, entity_type FROM word_analysis "
+                    f"WHERE model = ? AND word IN ({placeholders})",
+                    (self.model, *chunk),
+                )
+                for word, *values in rows:
+                    found[word] = dict(zip(ANALYSIS_KEYS, values))
+        return found
+
+    def set_many(self, analyses):
+        rows = [(word, self.model, *(a[key] for key in ANALYSIS_KEYS)) for word, a in analyses.items()]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO word_analysis (word, model, lemma, pos, tag, entity_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM word_analysis WHERE model = ?", (self.model,)).fetchone()[0]
+
+
+class WordAnalyzer:
+    # Single entry point for per-word lemma/POS/tag/entity lookups.
+    #
+    # Results are memoized in process and in an AnalysisCache; only words
+    # neither has seen go through spaCy, in batches via nlp.pipe with the
+    # unneeded components disabled. Large batches are spread over
+    # `n_process` worker processes; small ones stay in-process because
+    # starting workers costs more than tagging a handful of words.
+
+    def __init__(self, load_nlp, cache=None, n_process=None, batch_size=1000, parallel_min_words=10_000):
+        self.load_nlp = load_nlp
+        self.cache = cache
+        self.n_process = n_process or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.parallel_min_words = parallel_min_words
+        self.memory = {}
+        self.lock = threading.Lock()
+        self.analyzed = 0
+        self.memory_hits = 0
+        self.cache_hits = 0
+        self.seconds = 0.0
+
+    def analyze(self, word):
+        return self.analyze_many([word]).get(word)
+
+    def analyze_many(self, words, remember=True):
+        # remember=False skips the in-process memo, for one-pass bulk loads
+        # that would otherwise keep every word they saw.
+        words = list(dict.fromkeys(word for word in words if word))
+        with self.lock:
+            results = {word: self.memory[word] for word in words if word in self.memory}
+        self.memory_hits += len(results)
+        missing = [word for word in words if word not in results]
+
+        if missing and self.cache is not None:
+            cached = self.cache.get_many(missing)
+            self.cache_hits += len(cached)
+            results.update(cached)
+            missing = [word for word in missing if word not in cached]
+
+        if missing:
+            fresh = self._run_pipeline(missing)
+            if self.cache is not None:
+                self.cache.set_many(fresh)
+            results.update(fresh)
+
+        if remember:
+            with self.lock:
+                self.memory.update(results)
+        return results
+
+    def _run_pipeline(self, words):
+        nlp = self.load_nlp()
+        disable = [name for name in nlp.pipe_names if name not in ANALYSIS_PIPES]
+        n_process = min(self.n_process, -(-len(words) // self.batch_size))
+        if len(words) < self.parallel_min_words:
+            n_process = 1
+
+        start = time.perf_counter()
+        analyses = {}
+        with span("nlp.pipe"):
+            for word, doc in zip(
+                words, nlp.pipe(words, batch_size=self.batch_size, n_process=n_process, disable=disable)
+            ):
+                if len(doc):
+                    token = doc[0]
+                    analyses[word] = {
+                        "lemma": token.lemma_,
+                        "pos": token.pos_,
+                        "tag": token.tag_,
+                        "entity_type": token.ent_type_,
+                    }
+        count("spacy.docs", len(words))
+        self.seconds += time.perf_counter() - start
+        self.analyzed += len(words)
+        return analyses
+
+    def stats(self):
+        return {
+            "analyzed": self.analyzed,
+            "memory_hits": self.memory_hits,
+            "cache_hits": self.cache_hits,
+            "seconds": round(self.seconds, 3),
+            "words_per_second": round(self.analyzed / self.seconds) if self.seconds else 0,
+        }
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_hashes(data_dir):
+    # {filename: sha256} of the language files a bundle is checked against.
+    return {
+        entry.name: file_sha256(entry.path)
+        for entry in sorted(os.scandir(data_dir), key=lambda entry: entry.name)
+        if entry.name.endswith(".json")
+    }
+
+
+def write_bundle(path, files, sources, info=None):
+    # Copy `files` ({name in the bundle: current path}) into a bundle
+    # directory with a manifest of their sizes and checksums and of the
+    # language files (`sources`, {filename: sha256}) they were built from.
+    # The version is a hash of the contents, so identical builds share it.
+    # The bundle is assembled next to `path` and renamed into place, so a
+    # reader never sees half of an old bundle and half of a new one.
+    staging = path + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    entries = {}
+    for name, source in sorted(files.items()):
+        target = os.path.join(staging, name)
+        shutil.copyfile(source, target)
+        entries[name] = {"size": os.path.getsize(target), "sha256": file_sha256(target)}
+
+    manifest = {
+        "format": FORMAT,
+        "version": hashlib.sha256(json.dumps([entries, sources], sort_keys=True).encode("utf-8")).hexdigest()[:16],
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **(info or {}),
+        "sources": dict(sorted(sources.items())),
+        "files": entries,
+    }
+    with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    previous = path + ".old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, previous)
+    os.replace(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class LexiconBundle:
+    # A bundle opened for reading. Every file in it is immutable: the
+    # database is opened read-only without locking and the matrices and
+    # tables are memory-mapped, so processes serving chats share its pages.
+    # Problems with the bundle (missing, built by another format, for other
+    # language files or another spaCy model) raise ValueError with the
+    # reason.
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"no readable manifest ({e})")
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"format {self.manifest.get('format')}, expected {FORMAT}")
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def file(self, name):
+        # Path of `name` inside the bundle, or None if it was not bundled.
+        return os.path.join(self.path, name) if name in self.manifest["files"] else None
+
+    def verify(self, full=False):
+        # Sizes catch a truncated copy cheaply; full=True rehashes every file.
+        for name, entry in self.manifest["files"].items():
+            path = os.path.join(self.path, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                raise ValueError(f"{name} is missing")
+            if size != entry["size"]:
+                raise ValueError(f"{name} is {size} bytes, expected {entry['size']}")
+            if full and file_sha256(path) != entry["sha256"]:
+                raise ValueError(f"{name} does not match its checksum")
+
+    def check(self, data_dir, model=None, schema_version=None, full=False):
+        self.verify(full)
+        if schema_version is not None and self.manifest.get("schema_version") != schema_version:
+            raise ValueError(f"database schema {self.manifest.get('schema_version')}, expected {schema_version}")
+        if model is not None and self.manifest.get("model") != model:
+            raise ValueError(f"built with {self.manifest.get('model')}, running {model}")
+        current = source_hashes(data_dir)
+        built = self.manifest["sources"]
+        changed = sorted(name for name in set(current) | set(built) if current.get(name) != built.get(name))
+        if changed:
+            raise ValueError(f"language files changed since it was built: {', '.join(changed)}")
+
+    def load(self, name):
+        # Unpickle a bundled object. The checksum is checked first: a pickle
+        # is only ever read from the bundle this build step wrote.
+        path = self.file(name)
+        if path is None:
+            raise ValueError(f"{name} is not in the bundle")
+        if file_sha256(path) != self.manifest["files"][name]["sha256"]:
+            raise ValueError(f"{name} does not match its checksum")
+        with open(path, "rb") as f:
+            return pickle.load(f)
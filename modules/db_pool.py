@@ -0,0 +1,175 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from modules.instrumentation import count, span
+
+_STOP = object()
+
+
+class ConnectionPool:
+    # WAL-mode SQLite shared by sync and async callers.
+    #
+    # Reads borrow one of `readers` read-only connections, so lookups run
+    # concurrently and never queue behind ingestion. All writes are jobs,
+    # fn(conn, *args), handed to a single writer thread. The writer drains up
+    # to `write_batch` queued jobs into one transaction, with a savepoint per
+    # job so a failing job is rolled back without losing the others. Jobs
+    # must not commit; a job's future resolves once its batch is committed.
+    #
+    # read_only=True serves a database nothing will write to (a lexicon
+    # bundle): there is no writer, readers open it as immutable so they
+    # take no locks, and every write job fails.
+
+    def __init__(
+        self, path, readers=4, cache_size_kb=65536, mmap_size=256 * 1024 * 1024, write_batch=64, init=None, read_only=False
+    ):
+        self.path = path
+        self.read_only = read_only
+        self.write_batch = write_batch
+        self.pragmas = [
+            f"PRAGMA cache_size = {-int(cache_size_kb)}",
+            f"PRAGMA mmap_size = {int(mmap_size)}",
+            "PRAGMA temp_store = MEMORY",
+            "PRAGMA busy_timeout = 5000",
+        ]
+
+        self.writer = None
+        if not read_only:
+            self.writer = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self.writer.execute("PRAGMA journal_mode = WAL")
+            self.writer.execute("PRAGMA synchronous = NORMAL")
+            for pragma in self.pragmas:
+                self.writer.execute(pragma)
+            if init is not None:
+                init(self.writer)
+
+        self.readers = queue.Queue()
+        self.reader_connections = []
+        uri = f"file:{path}?mode=ro&immutable=1" if read_only else f"file:{path}?mode=ro"
+        for _ in range(readers):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            self.reader_connections.append(conn)
+            self.readers.put(conn)
+
+        self.jobs = queue.Queue()
+        self.stats = {"reads": 0, "writes": 0, "write_batches": 0, "write_errors": 0}
+        self.thread = None
+        if not read_only:
+            self.thread = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+            self.thread.start()
+
+    # Reads
+
+    @contextmanager
+    def reader(self):
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+
+    def read(self, fn, *args):
+        with self.reader() as conn, span("db.read"):
+            self.stats["reads"] += 1
+            return fn(conn, *args)
+
+    def fetchone(self, sql, params=()):
+        return self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    def fetchall(self, sql, params=()):
+        return self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def read_async(self, fn, *args):
+        return await asyncio.to_thread(self.read, fn, *args)
+
+    async def fetchone_async(self, sql, params=()):
+        return await asyncio.to_thread(self.fetchone, sql, params)
+
+    async def fetchall_async(self, sql, params=()):
+        return await asyncio.to_thread(self.fetchall, sql, params)
+
+    # Writes
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.read_only:
+            future.set_exception(RuntimeError(f"Database {self.path} is read-only"))
+            return future
+        self.jobs.put((fn, args, future))
+        return future
+
+    def write(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    async def write_async(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _write_loop(self):
+        while True:
+            job = self.jobs.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            while len(batch) < self.write_batch:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    self.jobs.put(_STOP)
+                    break
+                batch.append(job)
+            count("db.write_jobs", len(batch))
+            with span("db.write_batch"):
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        conn = self.writer
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = fn(conn, *args)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    self.stats["write_errors"] += 1
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for fn, args, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        self.stats["write_batches"] += 1
+        self.stats["writes"] += len(outcomes)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        if self.thread is not None:
+            self.jobs.put(_STOP)
+            self.thread.join()
+        for conn in self.reader_connections:
+            conn.close()
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import threading
+import time
+
+MISSING = object()
+
+
+class DefinitionCache:
+    # Persistent per-source cache for dictionary lookups.
+    #
+    # Entries expire after `ttl` seconds, "no definition" results after the
+    # shorter `negative_ttl`. Once more than `max_entries` rows are stored the
+    # least recently used ones are evicted. Values are stored as JSON so a
+    # source can cache a (definition, example) pair as easily as a string.
+
+    def __init__(self, path, ttl, negative_ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS definition_cache (
+                word TEXT,
+                source TEXT,
+                value TEXT,
+                negative INTEGER,
+                expires_at REAL,
+                last_used REAL,
+                PRIMARY KEY (word, source)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_definition_cache_last_used ON definition_cache(last_used);
+            """
+        )
+        self.size = self.conn.execute("SELECT COUNT(*) FROM definition_cache").fetchone()[0]
+
+    def get(self, word, source, touch=True):
+        # touch=False only reads: the caller reports the hit later through
+        # write_many, and an expired row is left for the next write to
+        # replace or purge_expired to drop.
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, negative, expires_at FROM definition_cache WHERE word = ? AND source = ?",
+                (word, source),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return MISSING
+
+            value, negative, expires_at = row
+            if expires_at < now:
+                if touch:
+                    self.conn.execute("DELETE FROM definition_cache WHERE word = ? AND source = ?", (word, source))
+                    self.conn.commit()
+                    self.size -= 1
+                self.expired += 1
+                self.misses += 1
+                return MISSING
+
+            if touch:
+                self.conn.execute(
+                    "UPDATE definition_cache SET last_used = ? WHERE word = ? AND source = ?", (now, word, source)
+                )
+                self.conn.commit()
+            if negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return json.loads(value)
+
+    def set(self, word, source, value, negative=None):
+        self.write_many([(word, source, value, negative)])
+
+    def write_many(self, entries, touched=()):
+        # Store (word, source, value, negative) entries, negative=None
+        # working it out from the value, and mark the (word, source) keys in
+        # `touched` as just used, all in one commit.
+        now = time.time()
+        rows = []
+        for word, source, value, negative in entries:
+            if negative is None:
+                negative = not value or (isinstance(value, (list, tuple)) and not any(value))
+            expires_at = now + (self.negative_ttl if negative else self.ttl)
+            rows.append((json.dumps(value), int(negative), expires_at, now, word, source))
+
+        with self.lock:
+            for row in rows:
+                updated = self.conn.execute(
+                    "UPDATE definition_cache SET value = ?, negative = ?, expires_at = ?, last_used = ? "
+                    "WHERE word = ? AND source = ?",
+                    row,
+                ).rowcount
+                if not updated:
+                    self.conn.execute(
+                        "INSERT INTO definition_cache (value, negative, expires_at, last_used, word, source) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    self.size += 1
+            self.conn.executemany(
+                "UPDATE definition_cache SET last_used = ? WHERE word = ? AND source = ?",
+                [(now, word, source) for word, source in touched],
+            )
+            if self.size > self.max_entries:
+                self._evict(self.size - self.max_entries)
+            self.conn.commit()
+
+    def _evict(self, count):
+        self.conn.execute(
+            "DELETE FROM definition_cache WHERE rowid IN "
+            "(SELECT rowid FROM definition_cache ORDER BY last_used LIMIT ?)",
+            (count,),
+        )
+        self.size -= count
+        self.evictions += count
+
+    def purge_expired(self):
+        with self.lock:
+            removed = self.conn.execute("DELETE FROM definition_cache WHERE expires_at < ?", (time.time(),)).rowcount
+            self.conn.commit()
+            self.size -= removed
+            self.expired += removed
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,206 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import quote_plus, urlsplit
+
+from modules.definition_cache import MISSING
+from modules.instrumentation import count, span
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class DefinitionSource:
+    name: str
+    url_template: str
+    parse: Callable
+
+    def url(self, word):
+        return self.url_template.format(word=quote_plus(word))
+
+
+def definition_text(value):
+    # Sources may cache a (definition, example) pair or a bare string.
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+
+class HostRateLimiter:
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.next_slot = {}
+        self.locks = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DefinitionFetcher:
+    # One shared aiohttp session for every dictionary source.
+    #
+    # A global semaphore bounds concurrent requests, each host is rate limited
+    # separately, failed requests are retried with exponential backoff, and
+    # concurrent lookups of the same (source, word) share one request.
+    # Cache writes (fetched values and last-used times of hits) are held
+    # until flush_cache, which commits them together off the event loop.
+    # The fetcher owns its extractor pool and shuts it down on close.
+
+    def __init__(
+        self,
+        sources,
+        max_concurrency=10,
+        per_host_rate=5.0,
+        retries=3,
+        backoff=0.5,
+        timeout=10.0,
+        cache=None,
+        extractor_pool=None,
+    ):
+        self.sources = list(sources)
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.extractor_pool = extractor_pool
+        self.limiter = HostRateLimiter(per_host_rate)
+        self.semaphore = None
+        self.session = None
+        self.in_flight = {}
+        self.cache_writes = {}
+        self.cache_touched = []
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "deduplicated": 0, "cache_hits": 0}
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": "Space-AI definition fetcher"},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.flush_cache()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.extractor_pool is not None:
+            await asyncio.to_thread(self.extractor_pool.shutdown)
+            self.extractor_pool = None
+
+    async def flush_cache(self):
+        if self.cache is None or not (self.cache_writes or self.cache_touched):
+            return
+        writes, touched = dict(self.cache_writes), self.cache_touched
+        self.cache_touched = []
+        entries = [(word, source, value, None) for (source, word), value in writes.items()]
+        with span("cache.flush"):
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.write_many, entries, touched)
+        # Kept until written so lookups meanwhile do not miss them.
+        for key, value in writes.items():
+            if self.cache_writes.get(key, MISSING) is value:
+                del self.cache_writes[key]
+
+    async def fetch(self, word, source):
+        key = (source.name, word)
+        if self.cache is not None:
+            cached = self.cache_writes.get(key, MISSING)
+            if cached is MISSING:
+                cached = self.cache.get(word, source.name, touch=False)
+                if cached is not MISSING:
+                    self.cache_touched.append((word, source.name))
+            if cached is not MISSING:
+                self.stats["cache_hits"] += 1
+                count("http.cache_hits")
+                return cached
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_uncached(word, source))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.stats["deduplicated"] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_uncached(self, word, source):
+        import aiohttp
+
+        url = source.url(word)
+        host = urlsplit(url).netloc
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                count("http.retries")
+                delay = self.backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+            async with self.semaphore:
+                await self.limiter.wait(host)
+                self.stats["requests"] += 1
+                count("http.requests")
+                try:
+                    with span(f"http.{source.name}"):
+                        async with self.session.get(url) as response:
+                            if response.status in RETRY_STATUSES:
+                                last_error = f"HTTP {response.status}"
+                                continue
+                            if response.status == 404:
+                                value = None
+                            elif response.status == 200:
+                                content = await response.read()
+                            else:
+                                self.stats["failures"] += 1
+                                count("http.failures")
+                                print(f"Error fetching definition for '{word}' from {source.name}: HTTP {response.status}")
+                                return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = str(e) or type(e).__name__
+                    continue
+
+            if response.status == 200:
+                if self.extractor_pool is not None:
+                    value = await self.extractor_pool.run(source.parse, content)
+                else:
+                    value = source.parse(content)
+            if self.cache is not None:
+                self.cache_writes[source.name, word] = value
+            return value
+
+        self.stats["failures"] += 1
+        count("http.failures")
+        print(f"Error fetching definition for '{word}' from {source.name}: {last_error}")
+        return None
+
+    async def fetch_definition(self, word):
+        for source in self.sources:
+            definition = definition_text(await self.fetch(word, source))
+            if definition:
+                return definition
+        return None
+
+    async def fetch_definitions(self, words):
+        words = list(dict.fromkeys(words))
+        results = await asyncio.gather(*(self.fetch_definition(word) for word in words))
+        await self.flush_cache()
+        return dict(zip(words, results))
@@ -0,0 +1,174 @@
+import heapq
+
+
+def bounded_distance(a, b, max_distance):
+    # Optimal string alignment distance (Levenshtein plus adjacent
+    # transpositions), or None as soon as it must exceed max_distance.
+    if a == b:
+        return 0
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if not a or not b:
+        distance = max(len(a), len(b))
+        return distance if distance <= max_distance else None
+
+    # Only cells within max_distance of the diagonal can stay in bounds,
+    # so each row fills a band of at most 2 * max_distance + 1 cells.
+    beyond = max_distance + 1
+    len_a, len_b = len(a), len(b)
+    previous_previous = None
+    previous = [j if j <= max_distance else beyond for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        current = [beyond] * (len_b + 1)
+        if i <= max_distance:
+            current[0] = i
+        char_a = a[i - 1]
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len_b, i + max_distance) + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1] and previous_previous[j - 2] + 1 < value:
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    distance = previous[len_b]
+    return distance if distance <= max_distance else None
+
+
+class FuzzyIndex:
+    # SymSpell-style symmetric delete index for spelling correction.
+    #
+    # Every term's first `prefix_length` characters are expanded into all
+    # variants with up to `max_distance` characters deleted. A lookup
+    # expands the input's prefix the same way and only computes the edit
+    # distance against terms that share a delete variant, so the cost does
+    # not grow with the size of the lexicon. Matching is case-insensitive;
+    # results come back in the spelling they were added with.
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms = {}
+        # Delete variant -> key, or a list of keys once several share it.
+        self.deletes = {}
+        self.longest = 0
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, word):
+        return word.casefold() in self.terms
+
+    def _variants(self, key):
+        prefix = key[: self.prefix_length]
+        variants = {prefix}
+        frontier = [prefix]
+        for _ in range(self.max_distance):
+            next_frontier = []
+            for variant in frontier:
+                for i in range(len(variant)):
+                    deleted = variant[:i] + variant[i + 1 :]
+                    if deleted not in variants:
+                        variants.add(deleted)
+                        next_frontier.append(deleted)
+            frontier = next_frontier
+        return variants
+
+    def add(self, word):
+        key = word.casefold()
+        if not key or key in self.terms:
+            return False
+        self.terms[key] = word
+        self.longest = max(self.longest, len(key))
+        deletes = self.deletes
+        for variant in self._variants(key):
+            entry = deletes.get(variant)
+            if entry is None:
+                deletes[variant] = key
+            elif isinstance(entry, list):
+                entry.append(key)
+            else:
+                deletes[variant] = [entry, key]
+        return True
+
+    def add_many(self, words):
+        return sum(1 for word in words if word and self.add(word))
+
+    def remove(self, word):
+        # Stale delete entries are skipped at lookup time.
+        return self.terms.pop(word.casefold(), None) is not None
+
+    def lookup(self, text, limit=5, max_distance=None):
+        # [(word, distance)] for the `limit` closest terms, ordered by
+        # distance, then closeness in length.
+        bound = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        phrase = text.casefold()
+        if limit == 1 and phrase in self.terms:
+            return [(self.terms[phrase], 0)]
+        input_length = len(phrase)
+        if not phrase or limit < 1 or input_length - bound > self.longest:
+            return []
+
+        prefix_length = min(input_length, self.prefix_length)
+        candidates = [phrase[:prefix_length]]
+        seen_candidates = {candidates[0]}
+        considered = set()
+        suggestions = {}
+        terms = self.terms
+        deletes = self.deletes
+
+        for candidate in candidates:
+            candidate_length = len(candidate)
+            if prefix_length - candidate_length > bound:
+                break
+
+            entry = deletes.get(candidate)
+            if entry is not None:
+                for key in (entry,) if isinstance(entry, str) else entry:
+                    if key in considered:
+                        continue
+                    considered.add(key)
+                    key_length = len(key)
+                    if abs(key_length - input_length) > bound or key not in terms:
+                        continue
+                    # Reaching this candidate from the term's own prefix took
+                    # more deletes than the bound allows.
+                    key_prefix = min(key_length, self.prefix_length)
+                    if key_prefix > prefix_length and key_prefix - candidate_length > bound:
+                        continue
+                    distance = bounded_distance(phrase, key, bound)
+                    if distance is None:
+                        continue
+                    suggestions[key] = distance
+                    if len(suggestions) >= limit:
+                        # Only the `limit` closest are returned, so nothing
+                        # farther than the current limit-th best matters.
+                        bound = heapq.nsmallest(limit, suggestions.values())[-1]
+
+            if prefix_length - candidate_length < bound:
+                for i in range(candidate_length):
+                    deleted = candidate[:i] + candidate[i + 1 :]
+                    if deleted not in seen_candidates:
+                        seen_candidates.add(deleted)
+                        candidates.append(deleted)
+
+        ranked = sorted(
+            ((key, distance) for key, distance in suggestions.items() if distance <= bound),
+            key=lambda item: (item[1], abs(len(item[0]) - input_length), item[0]),
+        )
+        return [(terms[key], distance) for key, distance in ranked[:limit]]
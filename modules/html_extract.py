@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from lxml import etree
+
+# Urban Dictionary pages are fed to lxml's pull parser in chunks so
+# extraction can stop as soon as the wanted elements are complete instead of
+# building the whole tree.
+CHUNK_SIZE = 16 * 1024
+
+
+def _has_class(element, name):
+    return name in (element.get("class") or "").split()
+
+
+def _text(element):
+    return "".join(element.itertext()).strip()
+
+
+def _iter_div_events(content, events):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    parser = etree.HTMLPullParser(events=events, tag="div")
+    for offset in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[offset : offset + CHUNK_SIZE])
+        yield from parser.read_events()
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        # Empty or truncated page: nothing more to extract.
+        return
+    yield from parser.read_events()
+
+
+def extract_urban_definition(content):
+    # First div.meaning and first div.example, as (definition, example).
+    definition = example = None
+    for _, element in _iter_div_events(content, ("end",)):
+        if definition is None and _has_class(element, "meaning"):
+            definition = _text(element)
+        elif example is None and _has_class(element, "example"):
+            example = _text(element)
+        if definition is not None and example is not None:
+            break
+    return definition, example
+
+
+# The OED snippet sits near the end of the page, so streaming cannot stop
+# early there; one parse into a tree plus a precompiled XPath is faster.
+OED_SNIPPET = etree.XPath("//div[@class='resultsSetItem'][1]//div[@class='snippet']/text()")
+
+
+def extract_oed_definition(content):
+    # First direct text node of the first div.snippet inside the first
+    # div.resultsSetItem.
+    if not content:
+        return None
+    tree = etree.HTML(content)
+    if tree is None:
+        return None
+    snippets = OED_SNIPPET(tree)
+    return snippets[0].strip() if snippets else None
+
+
+class ExtractorPool:
+    # Runs extractors off the event loop so fetching and parsing overlap.
+    # "process" sidesteps the GIL; "thread" avoids pickling the page.
+    # Worker processes are spawned rather than forked: the pool starts while
+    # the database writer, journal and event loop threads are running.
+
+    def __init__(self, kind="process", workers=None):
+        if kind == "process":
+            context = multiprocessing.get_context("spawn")
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        elif kind == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Unknown extractor pool kind: {kind}")
+        self.kind = kind
+
+    async def run(self, extractor, content):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, extractor, content)
+
+    def map(self, extractor, pages, chunksize=1):
+        if self.kind == "process":
+            return list(self.executor.map(extractor, pages, chunksize=chunksize))
+        return list(self.executor.map(extractor, pages))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,213 @@
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from modules.schema import insert_words
+
+_WHITESPACE = " \t\n\r"
+# What may follow a key or a value inside an object or array.
+_DELIMITERS = ",:}]" + _WHITESPACE
+_decoder = json.JSONDecoder()
+_skip_whitespace = re.compile(r"[ \t\n\r]*").match
+
+
+class _Reader:
+    # Text buffer over a file that only ever holds the value being parsed
+    # plus one chunk.
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # Next non-whitespace character, or "" at the end of the file.
+        while True:
+            self.pos = _skip_whitespace(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars or not char:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number cut off by the end of the chunk ("3.1" of "3.14e-2")
+            # still parses; only trust it once a delimiter follows.
+            if (end == len(self.buffer) or self.buffer[end] not in _DELIMITERS) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _members(reader):
+    # key, value pairs of the object whose "{" was just consumed.
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        yield key, reader.value()
+        if reader.expect(",}") == "}":
+            return
+
+
+def iter_language_file(path, chunk_size=1 << 16):
+    # (word, info) pairs from a data/language file, in file order, without
+    # loading the whole file. Both shapes are accepted:
+    #   {"Word": {...}, ...}
+    #   [{"Word": {...}, ...}, ...]
+    # Memory is bounded by the largest single entry (or list element).
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f, chunk_size)
+        start = reader.expect("{[")
+        if start == "{":
+            yield from _members(reader)
+            return
+        if reader.peek() == "]":
+            return
+        while True:
+            element = reader.value()
+            if isinstance(element, dict):
+                yield from element.items()
+            if reader.expect(",]") == "]":
+                return
+
+
+def iter_language_files(data_dir, exclude=()):
+    # Every *.json file in data_dir, in name order. A malformed file is
+    # reported and the entries read before the error are kept.
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(".json") or filename in exclude:
+            continue
+        try:
+            yield from iter_language_file(os.path.join(data_dir, filename))
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in file {filename}: {e}")
+
+
+# Pipeline stages. Each takes and returns an iterator, so nothing is read
+# until the writer asks for the next batch.
+
+def normalize_entries(pairs):
+    # Drop blank words, give every entry a dict with a "word" key.
+    for word, info in pairs:
+        if not isinstance(word, str) or not word.strip():
+            continue
+        if not isinstance(info, dict):
+            info = {"definition": info if isinstance(info, str) else None}
+        yield word, {**info, "word": word}
+
+
+def batched(pairs, size):
+    iterator = iter(pairs)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def skip_known(batches, known_words):
+    # known_words(words) -> the subset already stored. Words repeated
+    # within one batch are kept once, last entry winning.
+    for batch in batches:
+        entries = dict(batch)
+        known = known_words(list(entries))
+        fresh = [(word, info) for word, info in entries.items() if word not in known]
+        if fresh:
+            yield fresh
+
+
+def analyze_batches(batches, analyze):
+    # analyze(words) -> {word: {"lemma", "pos", "entity_type"}}
+    for batch in batches:
+        analyses = analyze([word for word, _ in batch])
+        yield [(word, {**info, **analyses.get(word, {})}) for word, info in batch]
+
+
+def word_rows(batches, pronounce, default_pos="ADJECTIVE"):
+    # pronounce(words) -> {word: ipa}; yields insert_words rows.
+    for batch in batches:
+        pronunciations = pronounce([word for word, _ in batch])
+        yield [
+            (word, info.get("lemma"), pronunciations.get(word), info.get("pos") or default_pos, info.get("definition") or None)
+            for word, info in batch
+        ]
+
+
+def parallel_batches(batches, work, workers, depth=2, initializer=None):
+    # work(batch) for every batch, spread over `workers` processes, results
+    # in input order. At most workers * depth batches are out at once, so
+    # reading stays just ahead of the workers instead of queueing the whole
+    # input. `work` and `initializer` must be importable module-level
+    # functions: workers are spawned rather than forked because the caller
+    # usually has a database writer thread running.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(work, batch))
+            if len(pending) >= workers * depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_batches(pool, batches, source=None, depth=2, on_written=None):
+    # Hand each batch to the pool's writer thread. At most `depth` batches
+    # are queued and uncommitted at a time; the next one is only produced
+    # (read, analyzed, ...) once the oldest has been committed, which keeps
+    # a slow disk from letting batches pile up in memory.
+    stats = {"batches": 0, "rows": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    pending = deque()
+
+    def settle():
+        rows, future = pending.popleft()
+        future.result()
+        stats["batches"] += 1
+        stats["rows"] += len(rows)
+        if on_written is not None:
+            on_written(rows)
+
+    for rows in batches:
+        pending.append((rows, pool.submit(insert_words, rows, source)))
+        if len(pending) >= depth:
+            settle()
+    while pending:
+        settle()
+    stats["seconds"] = time.perf_counter() - start
+    return stats
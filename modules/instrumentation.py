@@ -0,0 +1,300 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Process-wide latency histograms and counters for the hot paths.
+#
+# Everything is off until enable() is called. While off, timed() wrappers
+# and span() cost one global check, and count() returns immediately, so the
+# hooks can stay on paths that run thousands of times a second. Stats that
+# classes already keep (pool, caches, analyzer) are not duplicated; they
+# are registered as sources and copied into each report.
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_counters = Counter()
+_sources = {}
+_started = time.time()
+_report_path = None
+_logger = None
+_sampler = None
+
+# Latency buckets are powers of two in microseconds: bucket i holds
+# durations below 2**i us, the last one everything from ~9 minutes up.
+_BUCKETS = 30
+
+
+class Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * _BUCKETS
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), _BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        # Upper edge of the bucket holding the fraction-th sample, capped at
+        # the largest sample seen.
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(2**i / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1e3, 3),
+            "mean_ms": round(self.total / self.count * 1e3, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1e3, 3),
+            "p90_ms": round(self.percentile(0.9) * 1e3, 3),
+            "p99_ms": round(self.percentile(0.99) * 1e3, 3),
+            "max_ms": round(self.max * 1e3, 3),
+        }
+
+
+def enabled():
+    return _enabled
+
+
+def record(stage, seconds):
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.record(seconds)
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage):
+    # with span("db.read"): ...
+    return _Span(stage) if _enabled else _NO_SPAN
+
+
+def timed(stage=None):
+    # Decorator recording every call's latency under `stage` (default: the
+    # function's name). Works on plain and async functions.
+    def decorate(fn):
+        name = stage or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(name, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def register_source(name, stats):
+    # stats() is called for every report and should return a JSON-able
+    # dict, or None to leave the source out.
+    _sources[name] = stats
+
+
+def report():
+    with _lock:
+        stages = {stage: histogram.summary() for stage, histogram in sorted(_histograms.items())}
+        counters = dict(sorted(_counters.items()))
+    sources = {}
+    for name, stats in _sources.items():
+        try:
+            value = stats()
+        except Exception as e:
+            value = {"error": str(e)}
+        if value is not None:
+            sources[name] = value
+    result = {
+        "uptime_s": round(time.time() - _started, 3),
+        "stages": stages,
+        "counters": counters,
+        "sources": sources,
+    }
+    if _sampler is not None:
+        result["profile"] = _sampler.summary()
+    return result
+
+
+def write_report(path=None):
+    path = path or _report_path
+    if not path:
+        return None
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def log_line():
+    # "metrics: generate_response n=12 p50=1.024ms p99=4.096ms | db.read ..."
+    with _lock:
+        parts = [
+            f"{stage} n={h.count} p50={h.percentile(0.5) * 1e3:.3f}ms p99={h.percentile(0.99) * 1e3:.3f}ms"
+            for stage, h in sorted(_histograms.items())
+        ]
+        parts.extend(f"{name}={value}" for name, value in sorted(_counters.items()))
+    return "metrics: " + (" | ".join(parts) or "nothing recorded")
+
+
+class Sampler:
+    # Poor man's sampling profiler: every `interval` seconds it looks at
+    # what each other thread is running. `self` counts the innermost frame,
+    # `cumulative` every function on the stack (once per sample).
+
+    def __init__(self, interval=0.005, depth=64):
+        self.interval = interval
+        self.depth = depth
+        self.samples = 0
+        self.self_counts = Counter()
+        self.cumulative_counts = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                self.samples += 1
+                self.self_counts[_frame_label(frame)] += 1
+                seen = set()
+                for _ in range(self.depth):
+                    if frame is None:
+                        break
+                    seen.add(_frame_label(frame, line=False))
+                    frame = frame.f_back
+                self.cumulative_counts.update(seen)
+
+    def summary(self, top=25):
+        return {
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "self": self.self_counts.most_common(top),
+            "cumulative": self.cumulative_counts.most_common(top),
+        }
+
+
+def _frame_label(frame, line=True):
+    code = frame.f_code
+    location = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    return f"{location}:{frame.f_lineno}" if line else location
+
+
+def _log_loop(interval, stopped):
+    while not stopped.wait(interval):
+        print(log_line(), flush=True)
+
+
+def enable(report_path=None, log_interval=None, profile_interval=None):
+    # report_path: JSON report written by write_report() and at exit.
+    # log_interval: seconds between log_line() prints.
+    # profile_interval: seconds between Sampler samples.
+    global _enabled, _report_path, _logger, _sampler
+    _enabled = True
+    if report_path:
+        if _report_path is None:
+            atexit.register(write_report)
+        _report_path = report_path
+    if log_interval and _logger is None:
+        _logger = threading.Event()
+        threading.Thread(target=_log_loop, args=(log_interval, _logger), name="metrics-log", daemon=True).start()
+    if profile_interval and _sampler is None:
+        _sampler = Sampler(profile_interval).start()
+
+
+def disable():
+    global _enabled, _logger, _sampler
+    _enabled = False
+    if _logger is not None:
+        _logger.set()
+        _logger = None
+    if _sampler is not None:
+        _sampler.stop()
+        _sampler = None
+
+
+def reset():
+    global _started
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _started = time.time()
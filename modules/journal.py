@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+
+
+class WordJournal:
+    # Append-only JSON Lines log of learned words.
+    #
+    # append() writes one line and returns without waiting for the disk; a
+    # flusher thread fsyncs everything appended during the last
+    # `fsync_interval` seconds in one call. `words` always holds every entry
+    # seen by this process, so readers never rescan the file. compact()
+    # rotates the log to a side file, hands its entries to a fold callback
+    # and deletes it. A side file left by a crash is folded by the next
+    # compact(); a line cut short by a crash is ignored on replay.
+
+    def __init__(self, path, fsync_interval=0.2):
+        self.path = path
+        self.compacting_path = path + ".compacting"
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.compact_lock = threading.Lock()
+        self.words = {}
+        self.pending = 0
+        self.unsynced = 0
+        self.stats = {"appends": 0, "fsyncs": 0, "compactions": 0, "folded": 0}
+
+        for segment in (self.compacting_path, self.path):
+            self.words.update(self._read(segment))
+        self.pending = len(self._read(self.path))
+        self.file = open(self.path, "ab")
+
+        self.closed = False
+        self.wakeup = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_loop, name="word-journal-fsync", daemon=True)
+        self.flusher.start()
+
+    def __len__(self):
+        # Entries waiting to be compacted.
+        return self.pending
+
+    @staticmethod
+    def _read(path):
+        entries = {}
+        try:
+            with open(path, "rb") as f:
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return entries
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may be half-written if the process died.
+                if number != len(lines):
+                    print(f"Skipping corrupt line {number} in {path}")
+                continue
+            entries[entry["word"]] = entry
+        return entries
+
+    def append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.words[entry["word"]] = entry
+            self.pending += 1
+            self.unsynced += 1
+            self.stats["appends"] += 1
+        self.wakeup.set()
+
+    def sync(self):
+        with self.lock:
+            if self.unsynced:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+                self.stats["fsyncs"] += 1
+
+    def _flush_loop(self):
+        while not self.closed:
+            self.wakeup.wait()
+            # Let further appends pile up so they share one fsync.
+            time.sleep(self.fsync_interval)
+            self.wakeup.clear()
+            self.sync()
+
+    def compact(self, fold):
+        with self.compact_lock:
+            with self.lock:
+                if self.pending and not os.path.exists(self.compacting_path):
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                    self.file.close()
+                    os.replace(self.path, self.compacting_path)
+                    self.file = open(self.path, "ab")
+                    self.pending = 0
+                    self.unsynced = 0
+
+            entries = self._read(self.compacting_path)
+            if not entries:
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+                return 0
+            fold(entries)
+            os.remove(self.compacting_path)
+            self.stats["compactions"] += 1
+            self.stats["folded"] += len(entries)
+            return len(entries)
+
+    def close(self):
+        self.sync()
+        self.closed = True
+        self.wakeup.set()
+        with self.lock:
+            self.file.close()
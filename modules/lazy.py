@@ -0,0 +1,29 @@
+import functools
+import threading
+
+
+def lazy_singleton(factory):
+    # Build the value on first call and hand the same object back afterwards.
+    # The lock makes a background warm-up thread and the REPL thread agree on
+    # a single instance instead of loading a model twice.
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    def loaded():
+        return bool(instance)
+
+    def reset():
+        with lock:
+            instance.clear()
+
+    get.loaded = loaded
+    get.reset = reset
+    return get
@@ -0,0 +1,195 @@
+from array import array
+from collections.abc import MutableMapping
+
+# Length sentinels in a TextColumn.
+_NONE = 0xFFFFFFFF
+_SAME_AS_WORD = 0xFFFFFFFE
+
+# Rewrite the columns once this many deleted rows or dead blob bytes have
+# piled up and they make up at least half of the storage.
+_COMPACT_MIN = 1 << 16
+
+
+class Categories:
+    # Interned values of a low-cardinality field (POS, entity type); rows
+    # store a small integer code, 0 meaning no value.
+
+    def __init__(self, typecode="H"):
+        self.values = [None]
+        self.codes = {}
+        self.column = array(typecode)
+
+    def encode(self, value):
+        if value is None:
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value, word):
+        self.column.append(self.encode(value))
+
+    def set(self, row, value, word):
+        self.column[row] = self.encode(value)
+
+    def get(self, row, word):
+        return self.values[self.column[row]]
+
+
+class TextColumn:
+    # Free text (lemma, IPA, definition) packed into one UTF-8 buffer with a
+    # start offset and length per row. Empty strings take no buffer space
+    # and a value equal to the row's word is stored as a marker.
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.starts = array("Q")
+        self.lengths = array("I")
+        self.dead = 0
+
+    def _encode(self, value, word):
+        if value is None:
+            return 0, _NONE
+        if value == word:
+            return 0, _SAME_AS_WORD
+        data = value.encode("utf-8")
+        start = len(self.blob)
+        self.blob += data
+        return start, len(data)
+
+    def append(self, value, word):
+        start, length = self._encode(value, word)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def set(self, row, value, word):
+        old = self.lengths[row]
+        if old < _SAME_AS_WORD:
+            self.dead += old
+        self.starts[row], self.lengths[row] = self._encode(value, word)
+
+    def get(self, row, word):
+        length = self.lengths[row]
+        if length == _NONE:
+            return None
+        if length == _SAME_AS_WORD:
+            return word
+        start = self.starts[row]
+        return self.blob[start : start + length].decode("utf-8")
+
+
+class Lexicon(MutableMapping):
+    # word -> entry mapping with the entries stored column by column.
+    #
+    # A dict per word repeats every key and keeps its own copy of values
+    # most words share. Here each field is one column: POS and entity type
+    # are codes into a table of distinct values, free-text fields live in a
+    # single UTF-8 buffer. A word -> row dict gives O(1) lookups. Reading an
+    # entry builds a fresh dict, so code written for the dict-of-dicts
+    # word_data keeps working; assigning an entry replaces the whole row, as
+    # it would in a dict. Values that do not fit a column (non-strings,
+    # unknown keys, a "word" that differs from the key) are kept per row in
+    # `extras`.
+
+    CATEGORY_FIELDS = ("pos", "entity_type")
+    TEXT_FIELDS = ("lemma", "ipa", "definition")
+
+    def __init__(self, entries=()):
+        self.rows = {}
+        self.words = []
+        self.columns = {name: Categories() for name in self.CATEGORY_FIELDS}
+        self.columns.update((name, TextColumn()) for name in self.TEXT_FIELDS)
+        self.extras = {}
+        self.deleted = 0
+        self.update(entries)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, word):
+        return word in self.rows
+
+    def __getitem__(self, word):
+        row = self.rows[word]
+        entry = {"word": word}
+        for name, column in self.columns.items():
+            value = column.get(row, word)
+            if value is not None:
+                entry[name] = value
+        extra = self.extras.get(row)
+        if extra:
+            entry.update(extra)
+        return entry
+
+    def field(self, word, name, default=None):
+        # One field without building the entry dict.
+        row = self.rows.get(word)
+        if row is None:
+            return default
+        extra = self.extras.get(row)
+        if extra and name in extra:
+            return extra[name]
+        column = self.columns.get(name)
+        value = column.get(row, word) if column is not None else None
+        return default if value is None else value
+
+    def _split(self, word, entry):
+        values = {}
+        extra = {}
+        for name, value in entry.items():
+            if name == "word":
+                if value != word:
+                    extra[name] = value
+            elif name in self.columns and (value is None or isinstance(value, str)):
+                values[name] = value
+            else:
+                extra[name] = value
+        return values, extra
+
+    def __setitem__(self, word, entry):
+        values, extra = self._split(word, entry)
+        row = self.rows.get(word)
+        if row is None:
+            row = self.rows[word] = len(self.words)
+            self.words.append(word)
+            for name, column in self.columns.items():
+                column.append(values.get(name), word)
+            if extra:
+                self.extras[row] = extra
+            return
+        for name, column in self.columns.items():
+            column.set(row, values.get(name), word)
+        if extra:
+            self.extras[row] = extra
+        else:
+            self.extras.pop(row, None)
+        self._maybe_compact()
+
+    def __delitem__(self, word):
+        row = self.rows.pop(word)
+        self.words[row] = None
+        self.extras.pop(row, None)
+        for column in self.columns.values():
+            column.set(row, None, None)
+        self.deleted += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.deleted >= _COMPACT_MIN and self.deleted * 2 >= len(self.words):
+            self.compact()
+            return
+        for name in self.TEXT_FIELDS:
+            column = self.columns[name]
+            if column.dead >= _COMPACT_MIN and column.dead * 2 >= len(column.blob):
+                self.compact()
+                return
+
+    def compact(self):
+        # Drop deleted rows and text left behind by overwritten values.
+        fresh = type(self)((word, self[word]) for word in self.rows)
+        self.__dict__.update(fresh.__dict__)
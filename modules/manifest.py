@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+# Files whose mtime is this close to the scan time are re-hashed on the next
+# scan, since a second write within the filesystem's timestamp resolution
+# would otherwise go unnoticed.
+RACY_WINDOW_NS = 2_000_000_000
+
+# Fields produced by the analyze callback; everything else comes from the JSON.
+ANALYSIS_FIELDS = ("lemma", "pos", "entity_type")
+
+
+@dataclass
+class WordDelta:
+    added: dict = field(default_factory=dict)
+    changed: dict = field(default_factory=dict)
+    removed: set = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+
+@dataclass
+class LanguageScan:
+    # What scan_language_files found, for apply_language_scan to write once
+    # the words in needs_analysis have been analyzed.
+    file_updates: list
+    new_entries: dict
+    touched: set
+    previous_data: dict
+    needs_analysis: list
+
+
+def create_manifest_tables(conn):
+    # Plain execute() rather than executescript(), which would commit
+    # whatever transaction the caller has open.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS json_manifest (
+            filename TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            sha256 TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS json_manifest_words (
+            filename TEXT,
+            word TEXT,
+            info_hash TEXT,
+            word_data TEXT,
+            PRIMARY KEY (filename, word)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_json_manifest_words_word ON json_manifest_words(word)")
+
+
+def parse_language_file(content):
+    data = json.loads(content)
+    if isinstance(data, list):
+        entries = {}
+        for word_dict in data:
+            entries.update(word_dict)
+        return entries
+    return data
+
+
+def hash_info(info):
+    return hashlib.sha1(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _words_present(conn, words):
+    present = set()
+    words = list(words)
+    for i in range(0, len(words), 500):
+        chunk = words[i : i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT DISTINCT word FROM json_manifest_words WHERE word IN ({placeholders})", chunk
+        )
+        present.update(row[0] for row in rows)
+    return present
+
+
+def _stored_word_data(conn, words):
+    stored = {}
+    words = list(words)
+    for i in range(0, len(words), 500):
+        chunk = words[i : i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT word, word_data FROM json_manifest_words WHERE word IN ({placeholders}) ORDER BY filename",
+            chunk,
+        )
+        for word, data in rows:
+            record = json.loads(data)
+            stored[word] = {key: record[key] for key in ANALYSIS_FIELDS if key in record}
+    return stored
+
+
+def iter_word_data(conn):
+    # (word, entry) pairs; a word in several files appears once per file,
+    # later files last.
+    rows = conn.execute("SELECT word, word_data FROM json_manifest_words ORDER BY filename")
+    return ((word, json.loads(data)) for word, data in rows)
+
+
+def manifest_words(conn):
+    # Words of iter_word_data in the same order, without decoding entries.
+    return [row[0] for row in conn.execute("SELECT word FROM json_manifest_words ORDER BY filename")]
+
+
+def load_word_data(conn):
+    return dict(iter_word_data(conn))
+
+
+def scan_language_files(conn, data_dir):
+    # Compare every JSON file against its manifest row. Unchanged files cost
+    # one stat call; only files whose size, mtime and hash differ are parsed.
+    # Only reads, so it runs on a reader connection; returns None if nothing
+    # changed, otherwise a LanguageScan whose needs_analysis lists the words
+    # new to the lexicon.
+    scan_started_ns = time.time_ns()
+    known = {
+        filename: (size, mtime_ns, sha256)
+        for filename, size, mtime_ns, sha256 in conn.execute(
+            "SELECT filename, size, mtime_ns, sha256 FROM json_manifest"
+        )
+    }
+
+    present_files = set()
+    file_updates = []
+    touched = set()
+    new_entries = {}
+
+    for entry in os.scandir(data_dir):
+        if not entry.name.endswith(".json"):
+            continue
+        present_files.add(entry.name)
+        stat = entry.stat()
+        previous = known.get(entry.name)
+        if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+            continue
+
+        with open(entry.path, "rb") as f:
+            content = f.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        mtime_ns = stat.st_mtime_ns if scan_started_ns - stat.st_mtime_ns > RACY_WINDOW_NS else None
+
+        if previous and previous[2] == sha256:
+            file_updates.append((entry.name, stat.st_size, mtime_ns, sha256, None))
+            continue
+
+        try:
+            entries = parse_language_file(content)
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in file {entry.name}: {e}")
+            continue
+
+        old_hashes = dict(
+            conn.execute("SELECT word, info_hash FROM json_manifest_words WHERE filename = ?", (entry.name,))
+        )
+        hashes = {word: hash_info(info) for word, info in entries.items()}
+        changed_here = {word for word, h in hashes.items() if old_hashes.get(word) != h}
+        removed_here = set(old_hashes) - set(hashes)
+
+        touched.update(changed_here, removed_here)
+        for word in changed_here:
+            new_entries[entry.name, word] = (entries[word], hashes[word])
+        file_updates.append((entry.name, stat.st_size, mtime_ns, sha256, (changed_here, removed_here)))
+
+    for filename in set(known) - present_files:
+        words = [row[0] for row in conn.execute("SELECT word FROM json_manifest_words WHERE filename = ?", (filename,))]
+        touched.update(words)
+        file_updates.append((filename, None, None, None, None))
+
+    if not file_updates:
+        return None
+
+    new_words = list(dict.fromkeys(word for _, word in new_entries))
+    previous_data = _stored_word_data(conn, new_words)
+    needs_analysis = [word for word in new_words if word not in previous_data]
+    return LanguageScan(file_updates, new_entries, touched, previous_data, needs_analysis)
+
+
+def apply_language_scan(conn, scan, analyzed):
+    # Write a scan's manifest and word rows; analyzed is {word: analysis}
+    # for scan.needs_analysis. Left uncommitted: the caller (the pool's
+    # writer) owns the transaction.
+    present_before = _words_present(conn, scan.touched)
+    records = {}
+    for filename, size, mtime_ns, sha256, words in scan.file_updates:
+        if size is None:
+            conn.execute("DELETE FROM json_manifest WHERE filename = ?", (filename,))
+            conn.execute("DELETE FROM json_manifest_words WHERE filename = ?", (filename,))
+            continue
+
+        conn.execute(
+            "INSERT OR REPLACE INTO json_manifest (filename, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (filename, size, mtime_ns, sha256),
+        )
+        if words is None:
+            continue
+
+        changed_here, removed_here = words
+        conn.executemany(
+            "DELETE FROM json_manifest_words WHERE filename = ? AND word = ?",
+            [(filename, word) for word in removed_here],
+        )
+        rows = []
+        for word in changed_here:
+            info, info_hash = scan.new_entries[filename, word]
+            analysis = analyzed.get(word) or scan.previous_data.get(word) or {}
+            record = {**(info if isinstance(info, dict) else {}), **analysis, "word": word}
+            records[word] = record
+            rows.append((filename, word, info_hash, json.dumps(record)))
+        conn.executemany(
+            "INSERT OR REPLACE INTO json_manifest_words (filename, word, info_hash, word_data) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+    present_after = _words_present(conn, scan.touched)
+    delta = WordDelta(removed=present_before - present_after)
+    for word, record in records.items():
+        if word in present_before:
+            delta.changed[word] = record
+        else:
+            delta.added[word] = record
+    return delta
@@ -1,7 +1,8 @@
 # In nlp_utils.py
-import nltk  
-
 def get_part_of_speech(word):
-    text = nltk.word_tokenize(word)  # Tokenize into individual words
-    tagged_words = nltk.pos_tag(text)  
-    return tagged_words[0][1]  # Return the POS tag of the first (and only) word
+    # Penn Treebank tag (same tag set nltk.pos_tag used), served from the
+    # shared word analysis cache.
+    from database_utils import get_word_analyzer
+
+    analysis = get_word_analyzer().analyze(word)
+    return analysis["tag"] if analysis else None
@@ -0,0 +1,113 @@
+import string
+from collections import deque
+
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+
+def phrase_tokens(text):
+    # Same normalization for lexicon entries and input: case-folded,
+    # punctuation removed (as preprocess_input does), split on whitespace.
+    return tuple(text.casefold().translate(_STRIP_PUNCTUATION).split())
+
+
+class PhraseMatcher:
+    # Aho-Corasick automaton over tokens rather than characters.
+    #
+    # Every lexicon entry, one word or many, is a path of tokens from the
+    # root. Failure links let a single left-to-right pass over a sentence
+    # report every entry that occurs in it, overlapping ones included, in
+    # time proportional to the sentence plus the matches, however many
+    # entries the automaton holds. Adding entries marks the links stale;
+    # they are rebuilt on the next match.
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        # Entry that ends at each node (canonical spelling, token count).
+        self.entry = [None]
+        # Nearest node on the failure chain that ends an entry.
+        self.output_link = [0]
+        self.size = 0
+        self.stale = False
+
+    def __len__(self):
+        return self.size
+
+    def add(self, phrase):
+        tokens = phrase_tokens(phrase)
+        if not tokens:
+            return False
+        node = 0
+        for token in tokens:
+            next_node = self.goto[node].get(token)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][token] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.entry.append(None)
+                self.output_link.append(0)
+            node = next_node
+        if self.entry[node] is not None:
+            return False
+        self.entry[node] = (phrase, len(tokens))
+        self.size += 1
+        self.stale = True
+        return True
+
+    def add_many(self, phrases):
+        return sum(1 for phrase in phrases if phrase and self.add(phrase))
+
+    def __getstate__(self):
+        # Pickled with its failure links in place, ready to match once loaded.
+        if self.stale:
+            self._build_links()
+        return self.__dict__
+
+    def _build_links(self):
+        goto, fail, entry, output_link = self.goto, self.fail, self.entry, self.output_link
+        queue = deque()
+        for node in goto[0].values():
+            fail[node] = 0
+            output_link[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for token, child in goto[node].items():
+                state = fail[node]
+                while state and token not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(token, 0)
+                fail[child] = target if target != child else 0
+                output_link[child] = fail[child] if entry[fail[child]] is not None else output_link[fail[child]]
+                queue.append(child)
+        self.stale = False
+
+    def find_all(self, text):
+        # [(start, end, phrase)] token spans, every match including overlaps.
+        if self.stale:
+            self._build_links()
+        goto, fail, entry, output_link = self.goto, self.fail, self.entry, self.output_link
+        matches = []
+        state = 0
+        for position, token in enumerate(phrase_tokens(text)):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            node = state if entry[state] is not None else output_link[state]
+            while node:
+                phrase, length = entry[node]
+                matches.append((position + 1 - length, position + 1, phrase))
+                node = output_link[node]
+        return matches
+
+    def find(self, text):
+        # Leftmost-longest, non-overlapping matches: "kick the bucket" wins
+        # over "kick" and "bucket" inside it.
+        chosen = []
+        end = 0
+        for start, stop, phrase in sorted(self.find_all(text), key=lambda m: (m[0], -m[1])):
+            if start >= end:
+                chosen.append((start, stop, phrase))
+                end = stop
+        return chosen
@@ -0,0 +1,165 @@
+import mmap
+import os
+import struct
+from bisect import bisect_right
+
+# CMUdict's 39 ARPAbet phonemes as General American IPA.
+ARPABET_TO_IPA = {
+    "AA": "ɑ", "AE": "æ", "AH": "ʌ", "AO": "ɔ", "AW": "aʊ", "AY": "aɪ",
+    "B": "b", "CH": "tʃ", "D": "d", "DH": "ð", "EH": "ɛ", "ER": "ɝ",
+    "EY": "eɪ", "F": "f", "G": "ɡ", "HH": "h", "IH": "ɪ", "IY": "i",
+    "JH": "dʒ", "K": "k", "L": "l", "M": "m", "N": "n", "NG": "ŋ",
+    "OW": "oʊ", "OY": "ɔɪ", "P": "p", "R": "ɹ", "S": "s", "SH": "ʃ",
+    "T": "t", "TH": "θ", "UH": "ʊ", "UW": "u", "V": "v", "W": "w",
+    "Y": "j", "Z": "z", "ZH": "ʒ",
+}
+# Unstressed variants that have their own IPA symbol.
+UNSTRESSED = {"AH": "ə", "ER": "ɚ"}
+STRESS_MARKS = {"1": "ˈ", "2": "ˌ"}
+
+MAGIC = b"IPAT"
+VERSION = 1
+_HEADER = struct.Struct("<4sII")
+# Every SPARSE_STEP-th key is copied into memory when a table is opened.
+SPARSE_STEP = 32
+
+
+def arpabet_to_ipa(phones):
+    # ["HH", "AH0", "L", "OW1"] -> "həlˈoʊ", stress marks going before the
+    # stressed vowel (not moved to the syllable onset).
+    ipa = []
+    for phone in phones:
+        stress = phone[-1] if phone[-1].isdigit() else None
+        base = phone.rstrip("012")
+        if stress == "0" and base in UNSTRESSED:
+            ipa.append(UNSTRESSED[base])
+            continue
+        ipa.append(STRESS_MARKS.get(stress, ""))
+        ipa.append(ARPABET_TO_IPA.get(base, base.lower()))
+    return "".join(ipa)
+
+
+def build_pronunciation_table(entries, path):
+    # entries: (word, ARPAbet phones) pairs in CMUdict order; the first
+    # pronunciation of each word is kept. Returns the number of words.
+    #
+    # File layout, little-endian:
+    #   magic, version, count
+    #   count + 1 uint32 key offsets, count + 1 uint32 value offsets
+    #   keys (case-folded UTF-8, sorted bytewise), then values (IPA, UTF-8)
+    # Offsets are relative to the start of their blob.
+    pronunciations = {}
+    for word, phones in entries:
+        key = word.casefold().encode("utf-8")
+        if key not in pronunciations:
+            pronunciations[key] = arpabet_to_ipa(phones).encode("utf-8")
+
+    keys = sorted(pronunciations)
+    key_offsets, value_offsets = [0], [0]
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+        value_offsets.append(value_offsets[-1] + len(pronunciations[key]))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(keys)))
+        f.write(struct.pack(f"<{len(key_offsets)}I", *key_offsets))
+        f.write(struct.pack(f"<{len(value_offsets)}I", *value_offsets))
+        f.write(b"".join(keys))
+        f.write(b"".join(pronunciations[key] for key in keys))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+class PronunciationTable:
+    # Read-only view of a file written by build_pronunciation_table.
+    #
+    # The file is mapped rather than read, so opening it only copies one key
+    # in SPARSE_STEP, every process serving chats shares the same pages, and
+    # only the parts a lookup touches are ever paged in. A lookup bisects a small in-memory
+    # sample of the sorted keys, then binary-searches the one block of the
+    # file it points to. Without a path the table is empty.
+
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self.map = None
+        self.sparse = []
+        if path is None:
+            return
+
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} pronunciation table")
+
+        self.count = count
+        start = _HEADER.size
+        offset_bytes = 4 * (count + 1)
+        view = memoryview(self.map)
+        self.key_offsets = view[start : start + offset_bytes].cast("I")
+        self.value_offsets = view[start + offset_bytes : start + 2 * offset_bytes].cast("I")
+        self.keys_start = start + 2 * offset_bytes
+        self.values_start = self.keys_start + self.key_offsets[count]
+        self.sparse = [self._key(i) for i in range(0, count, SPARSE_STEP)]
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, word):
+        return self._find(word.casefold().encode("utf-8"), 0)[1]
+
+    def _key(self, i):
+        start = self.keys_start
+        return self.map[start + self.key_offsets[i] : start + self.key_offsets[i + 1]]
+
+    def _value(self, i):
+        start = self.values_start
+        return self.map[start + self.value_offsets[i] : start + self.value_offsets[i + 1]].decode("utf-8")
+
+    def _find(self, key, lo):
+        # (position, found): where key is or would be inserted, searching
+        # from lo onwards.
+        block = bisect_right(self.sparse, key) - 1
+        if block < 0:
+            return 0, False
+        lo = max(lo, block * SPARSE_STEP)
+        hi = min(self.count, (block + 1) * SPARSE_STEP)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo, lo < self.count and self._key(lo) == key
+
+    def get(self, word, default=None):
+        position, found = self._find(word.casefold().encode("utf-8"), 0)
+        return self._value(position) if found else default
+
+    def get_many(self, words):
+        # {word: ipa} for the words in the table. Keys are looked up in
+        # sorted order, so each search starts where the previous one ended.
+        keys = {}
+        for word in words:
+            keys.setdefault(word.casefold().encode("utf-8"), []).append(word)
+        found = {}
+        position = 0
+        for key in sorted(keys):
+            position, hit = self._find(key, position)
+            if hit:
+                ipa = self._value(position)
+                for word in keys[key]:
+                    found[word] = ipa
+        return found
+
+    def close(self):
+        if self.map is not None:
+            self.key_offsets.release()
+            self.value_offsets.release()
+            self.map.close()
+            self.map = None
@@ -0,0 +1,543 @@
+import re
+import sqlite3
+
+SCHEMA_VERSION = 3
+
+# Universal POS tags as produced by spaCy, with a readable name for each.
+PARTS_OF_SPEECH = {
+    "ADJ": "Adjective",
+    "ADP": "Preposition",
+    "ADV": "Adverb",
+    "AUX": "Auxiliary",
+    "CCONJ": "Conjunction",
+    "DET": "Determiner",
+    "INTJ": "Interjection",
+    "NOUN": "Noun",
+    "NUM": "Numeral",
+    "PART": "Particle",
+    "PRON": "Pronoun",
+    "PROPN": "Proper noun",
+    "PUNCT": "Punctuation",
+    "SCONJ": "Subordinating conjunction",
+    "SYM": "Symbol",
+    "VERB": "Verb",
+    "X": "Other",
+}
+
+# Spellings the old per-POS tables and defaults used.
+POS_ALIASES = {
+    "ADJECTIVE": "ADJ",
+    "ADVERB": "ADV",
+    "PREPOSITION": "ADP",
+    "CONJUNCTION": "CCONJ",
+    "INTERJECTION": "INTJ",
+    "PRONOUN": "PRON",
+    "ARTICLE": "DET",
+}
+
+# Tables created by the old insert_word paths looked like this; the
+# migration folds them into words/word_pos/definitions and drops them.
+LEGACY_POS_TABLE_COLUMNS = {"word_id", "word", "lemma", "ipa", "definition"}
+CORE_TABLES = {
+    "words", "parts_of_speech", "word_pos", "definitions", "synonyms", "antonyms",
+    "word_families", "word_family_members", "origins", "word_origins",
+}
+
+INSERT_WORD_SQL = """
+    INSERT OR IGNORE INTO words (word, lemma, ipa, pos, definition)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+ENSURE_POS_SQL = "INSERT OR IGNORE INTO parts_of_speech (pos_type, name) VALUES (?, ?)"
+
+LINK_POS_SQL = """
+    INSERT OR IGNORE INTO word_pos (word_id, pos_id)
+    SELECT w.word_id, p.pos_id FROM words w, parts_of_speech p
+    WHERE w.word = ? AND p.pos_type = ?
+"""
+
+INSERT_DEFINITION_SQL = """
+    INSERT INTO definitions (word_id, definition, example_usage, source)
+    SELECT w.word_id, ?, ?, ? FROM words w
+    WHERE w.word = ? AND NOT EXISTS (
+        SELECT 1 FROM definitions d WHERE d.word_id = w.word_id AND d.definition = ?
+    )
+"""
+
+# Lookups the app performs, keyed by name so the benchmark can check each
+# plan with EXPLAIN QUERY PLAN.
+QUERIES = {
+    "word": "SELECT word_id, word, lemma, ipa, pos, definition FROM words WHERE word = ?",
+    "word_nocase": "SELECT word_id, word, lemma, ipa, pos, definition FROM words WHERE lower(word) = lower(?)",
+    "lemma": "SELECT word FROM words WHERE lemma = ?",
+    "pos": "SELECT word FROM words WHERE pos = ? LIMIT ?",
+    "word_pos": """
+        SELECT p.pos_type FROM words w
+        JOIN word_pos wp ON wp.word_id = w.word_id
+        JOIN parts_of_speech p ON p.pos_id = wp.pos_id
+        WHERE w.word = ?
+    """,
+    "words_for_pos": """
+        SELECT w.word FROM parts_of_speech p
+        JOIN word_pos wp ON wp.pos_id = p.pos_id
+        JOIN words w ON w.word_id = wp.word_id
+        WHERE p.pos_type = ? LIMIT ?
+    """,
+    "definitions": """
+        SELECT d.definition, d.example_usage, d.source FROM words w
+        JOIN definitions d ON d.word_id = w.word_id
+        WHERE w.word = ?
+    """,
+}
+
+
+def normalize_pos(pos):
+    if not pos:
+        return "X"
+    tag = str(pos).strip().upper()
+    if tag in PARTS_OF_SPEECH:
+        return tag
+    if tag in POS_ALIASES:
+        return POS_ALIASES[tag]
+    # Legacy table names were the tag lowercased with an "s" appended.
+    if tag.endswith("S") and (tag[:-1] in PARTS_OF_SPEECH or tag[:-1] in POS_ALIASES):
+        return normalize_pos(tag[:-1])
+    return tag
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _rebuild(conn, table, create_sql, columns):
+    # Recreate a table whose "INT AUTO_INCREMENT PRIMARY KEY" (MySQL syntax)
+    # never aliased rowid, leaving every id NULL.
+    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    conn.execute(create_sql)
+    keep = [column for column in columns if column in _columns(conn, f"{table}_old")]
+    if keep:
+        column_list = ", ".join(keep)
+        conn.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_old")
+    conn.execute(f"DROP TABLE {table}_old")
+
+
+def _migrate_to_v1(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS words (
+            word_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT UNIQUE,
+            lemma TEXT,
+            ipa TEXT,
+            pos TEXT,
+            definition TEXT
+        )
+        """
+    )
+
+    tables = _tables(conn)
+    parts_of_speech_sql = """
+        CREATE TABLE parts_of_speech (
+            pos_id INTEGER PRIMARY KEY,
+            pos_type TEXT UNIQUE NOT NULL,
+            name TEXT
+        )
+    """
+    if "parts_of_speech" in tables:
+        # Old rows are duplicated names with NULL ids; reseed instead of copying.
+        conn.execute("DROP TABLE parts_of_speech")
+    conn.execute(parts_of_speech_sql)
+    conn.executemany(ENSURE_POS_SQL, PARTS_OF_SPEECH.items())
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS word_pos (
+            word_id INTEGER,
+            pos_id INTEGER,
+            PRIMARY KEY (word_id, pos_id),
+            FOREIGN KEY (word_id) REFERENCES words(word_id),
+            FOREIGN KEY (pos_id) REFERENCES parts_of_speech(pos_id)
+        )
+        """
+    )
+    if "word_pos" in tables:
+        conn.execute("DELETE FROM word_pos")
+
+    definitions_sql = """
+        CREATE TABLE definitions (
+            definition_id INTEGER PRIMARY KEY,
+            word_id INTEGER,
+            definition TEXT,
+            example_usage TEXT,
+            source TEXT,
+            FOREIGN KEY (word_id) REFERENCES words(word_id)
+        )
+    """
+    if "definitions" in tables:
+        _rebuild(conn, "definitions", definitions_sql, ["word_id", "definition", "example_usage"])
+    else:
+        conn.execute(definitions_sql)
+
+    for table, column in (("synonyms", "synonym_word_id"), ("antonyms", "antonym_word_id")):
+        relation_sql = f"""
+            CREATE TABLE {table} (
+                {table[:-1]}_id INTEGER PRIMARY KEY,
+                word_id INTEGER,
+                {column} INTEGER,
+                FOREIGN KEY (word_id) REFERENCES words(word_id),
+                FOREIGN KEY ({column}) REFERENCES words(word_id)
+            )
+        """
+        if table in tables:
+            _rebuild(conn, table, relation_sql, ["word_id", column])
+        else:
+            conn.execute(relation_sql)
+
+    conn.create_function("normalize_pos", 1, normalize_pos, deterministic=True)
+
+    for table in sorted(_tables(conn) - CORE_TABLES):
+        if table.startswith("sqlite_") or _columns(conn, table) != LEGACY_POS_TABLE_COLUMNS:
+            continue
+        pos = normalize_pos(table)
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO words (word, lemma, ipa, pos, definition)
+            SELECT word, lemma, ipa, ?, definition FROM "{table}" WHERE word IS NOT NULL
+            """,
+            (pos,),
+        )
+        conn.execute(ENSURE_POS_SQL, (pos, pos.title()))
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO word_pos (word_id, pos_id)
+            SELECT w.word_id, p.pos_id FROM "{table}" t
+            JOIN words w ON w.word = t.word
+            JOIN parts_of_speech p ON p.pos_type = ?
+            """,
+            (pos,),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO definitions (word_id, definition)
+            SELECT w.word_id, t.definition FROM "{table}" t
+            JOIN words w ON w.word = t.word
+            WHERE t.definition IS NOT NULL AND t.definition != ''
+            """
+        )
+        conn.execute(f'DROP TABLE "{table}"')
+
+    conn.execute("UPDATE words SET pos = normalize_pos(pos)")
+    conn.execute(
+        "INSERT OR IGNORE INTO parts_of_speech (pos_type, name) SELECT DISTINCT pos, pos FROM words"
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO word_pos (word_id, pos_id)
+        SELECT w.word_id, p.pos_id FROM words w JOIN parts_of_speech p ON p.pos_type = w.pos
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO definitions (word_id, definition)
+        SELECT w.word_id, w.definition FROM words w
+        WHERE w.definition IS NOT NULL AND w.definition != ''
+        AND NOT EXISTS (SELECT 1 FROM definitions d WHERE d.word_id = w.word_id AND d.definition = w.definition)
+        """
+    )
+
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS idx_words_lemma ON words(lemma)",
+        "CREATE INDEX IF NOT EXISTS idx_words_pos ON words(pos)",
+        "CREATE INDEX IF NOT EXISTS idx_words_word_lower ON words(lower(word))",
+        "CREATE INDEX IF NOT EXISTS idx_word_pos_pos ON word_pos(pos_id, word_id)",
+        "CREATE INDEX IF NOT EXISTS idx_definitions_word ON definitions(word_id)",
+        "CREATE INDEX IF NOT EXISTS idx_synonyms_word ON synonyms(word_id)",
+        "CREATE INDEX IF NOT EXISTS idx_antonyms_word ON antonyms(word_id)",
+    ):
+        conn.execute(statement)
+
+
+# Reverse-dictionary index: one row per word (rowid = word_id) holding the
+# word's summary definition and every example usage recorded for it,
+# stemmed so "rarely" finds "rare". Triggers keep it in step with words and
+# definitions whichever path writes them.
+SEARCH_TEXT_SQL = """
+    SELECT w.word_id, w.definition, (
+        SELECT group_concat(d.example_usage, ' ') FROM definitions d
+        WHERE d.word_id = w.word_id AND d.example_usage IS NOT NULL
+    ) AS examples
+    FROM words w
+"""
+
+SEARCH_TRIGGERS = {
+    "words_search_insert": "AFTER INSERT ON words",
+    "words_search_update": "AFTER UPDATE OF definition ON words",
+    "words_search_delete": "AFTER DELETE ON words",
+    "definitions_search_insert": "AFTER INSERT ON definitions WHEN NEW.example_usage IS NOT NULL",
+    "definitions_search_update": "AFTER UPDATE OF example_usage, word_id ON definitions",
+    "definitions_search_delete": "AFTER DELETE ON definitions WHEN OLD.example_usage IS NOT NULL",
+}
+
+
+def _refresh_search_sql(word_id, delete=True):
+    # Statements that rewrite the index row of the word whose id is the
+    # SQL expression `word_id`; words with no text get no row.
+    return f"""
+        {f"DELETE FROM word_search WHERE rowid = {word_id};" if delete else ""}
+        INSERT INTO word_search (rowid, definition, example_usage)
+        SELECT * FROM ({SEARCH_TEXT_SQL} WHERE w.word_id = {word_id})
+        WHERE coalesce(definition, '') != '' OR examples IS NOT NULL;
+    """
+
+
+def _search_trigger_body(name):
+    if name == "words_search_insert":
+        return _refresh_search_sql("NEW.word_id", delete=False)
+    if name == "definitions_search_update":
+        # The example may have moved to another word.
+        return _refresh_search_sql("OLD.word_id") + _refresh_search_sql("NEW.word_id")
+    return _refresh_search_sql("OLD.word_id" if name.endswith("delete") else "NEW.word_id")
+
+
+def _migrate_to_v2(conn):
+    # The index is left out, and search falls back to LIKE, on an SQLite
+    # built without FTS5.
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS word_search USING fts5(
+                definition, example_usage,
+                tokenize = 'porter unicode61 remove_diacritics 2',
+                prefix = '3'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return
+    for name, event in SEARCH_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {_search_trigger_body(name)} END")
+    conn.execute(
+        f"""
+        INSERT INTO word_search (rowid, definition, example_usage)
+        SELECT * FROM ({SEARCH_TEXT_SQL})
+        WHERE coalesce(definition, '') != '' OR examples IS NOT NULL
+        """
+    )
+
+
+MANIFEST_DEFINITION_SQL = "json_extract(m.word_data, '$.definition')"
+
+
+def _migrate_to_v3(conn):
+    # Words added by check_for_updates used to be stored without the
+    # definition from their language file, so neither words.definition nor
+    # the search index had it. Fill them in from the scan manifest, which
+    # keeps every entry as read (later files win). A new database has no
+    # manifest yet and nothing to fill.
+    if "json_manifest_words" not in _tables(conn):
+        return
+    conn.execute(
+        f"""
+        UPDATE words SET definition = (
+            SELECT {MANIFEST_DEFINITION_SQL} FROM json_manifest_words m
+            WHERE m.word = words.word AND coalesce({MANIFEST_DEFINITION_SQL}, '') != ''
+            ORDER BY m.filename DESC LIMIT 1
+        )
+        WHERE coalesce(definition, '') = '' AND EXISTS (
+            SELECT 1 FROM json_manifest_words m
+            WHERE m.word = words.word AND coalesce({MANIFEST_DEFINITION_SQL}, '') != ''
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO definitions (word_id, definition, example_usage, source)
+        SELECT w.word_id, w.definition, NULL, NULL FROM words w
+        WHERE coalesce(w.definition, '') != ''
+            AND w.word IN (SELECT word FROM json_manifest_words)
+            AND NOT EXISTS (SELECT 1 FROM definitions d WHERE d.word_id = w.word_id AND d.definition = w.definition)
+        """
+    )
+
+
+MIGRATIONS = [_migrate_to_v1, _migrate_to_v2, _migrate_to_v3]
+
+
+def migrate(conn):
+    # Bring a sqlite3 connection's database up to SCHEMA_VERSION, one
+    # migration per transaction, recording progress in PRAGMA user_version.
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def word_write_params(rows, source=None):
+    # Parameters for INSERT_WORD_SQL, ENSURE_POS_SQL, LINK_POS_SQL and
+    # INSERT_DEFINITION_SQL from (word, lemma, ipa, pos, definition) rows.
+    words, pos_types, links, definitions = [], {}, [], []
+    for word, lemma, ipa, pos, definition in rows:
+        pos = normalize_pos(pos)
+        words.append((word, lemma, ipa, pos, definition))
+        pos_types[pos] = PARTS_OF_SPEECH.get(pos, pos.title())
+        links.append((word, pos))
+        if definition:
+            definitions.append((definition, None, source, word, definition))
+    return words, list(pos_types.items()), links, definitions
+
+
+def insert_words(conn, rows, source=None):
+    words, pos_types, links, definitions = word_write_params(rows, source)
+    conn.executemany(INSERT_WORD_SQL, words)
+    conn.executemany(ENSURE_POS_SQL, pos_types)
+    conn.executemany(LINK_POS_SQL, links)
+    conn.executemany(INSERT_DEFINITION_SQL, definitions)
+
+
+def add_definition(conn, word, definition, example=None, source=None):
+    conn.execute(INSERT_DEFINITION_SQL, (definition, example, source, word, definition))
+
+
+def set_definitions(conn, definitions, source=None):
+    # definitions: {word: definition}. Updates the words table's summary
+    # column and records each definition once in definitions.
+    rows = [(word, definition) for word, definition in definitions.items() if definition]
+    conn.executemany("UPDATE words SET definition = ? WHERE word = ?", [(d, w) for w, d in rows])
+    conn.executemany(INSERT_DEFINITION_SQL, [(d, None, source, w, d) for w, d in rows])
+
+
+# Batch lookups bind at most this many words per IN (...) list, well under
+# SQLite's bound-parameter limit (999 before 3.32).
+IN_CHUNK_SIZE = 500
+
+
+def _select_in(conn, sql, words):
+    # Rows of `sql` with its {placeholders} filled for each chunk of words.
+    words = list(dict.fromkeys(words))
+    for i in range(0, len(words), IN_CHUNK_SIZE):
+        chunk = words[i : i + IN_CHUNK_SIZE]
+        yield from conn.execute(sql.format(placeholders=",".join("?" * len(chunk))), chunk)
+
+
+def existing_words(conn, words):
+    # The subset of `words` stored in the words table.
+    return {row[0] for row in _select_in(conn, "SELECT word FROM words WHERE word IN ({placeholders})", words)}
+
+
+def words_without_definition(conn):
+    return [row[0] for row in conn.execute("SELECT word FROM words WHERE coalesce(definition, '') = ''")]
+
+
+def word_rows_for(conn, words):
+    # {word: (word_id, word, lemma, ipa, pos, definition)} for the stored ones.
+    sql = "SELECT word_id, word, lemma, ipa, pos, definition FROM words WHERE word IN ({placeholders})"
+    return {row[1]: row for row in _select_in(conn, sql, words)}
+
+
+def pos_for_words(conn, words):
+    # {word: pos} for the stored ones.
+    return dict(_select_in(conn, "SELECT word, pos FROM words WHERE word IN ({placeholders})", words))
+
+
+_SEARCH_TERM = re.compile(r"\w+")
+
+# BM25 is computed for every row a query matches, so at most this many
+# matches are ranked; a query made only of words found in most definitions
+# ("of the") ranks the first ones instead of the whole index. Terms that
+# match more rows than this are also left out of the OR pass.
+SEARCH_MAX_CANDIDATES = 5000
+
+# Definition text counts twice as much as example usage.
+SEARCH_SQL = """
+    SELECT w.word, w.definition, m.score FROM (
+        SELECT rowid, bm25(word_search, 1.0, 0.5) AS score
+        FROM word_search WHERE word_search MATCH ? LIMIT ?
+    ) m JOIN words w ON w.word_id = m.rowid
+    ORDER BY m.score LIMIT ?
+"""
+
+
+def search_terms(text):
+    return list(dict.fromkeys(term.lower() for term in _SEARCH_TERM.findall(text)))
+
+
+def match_expression(terms, operator="AND"):
+    # The terms joined by `operator`, each quoted so FTS syntax in user
+    # input is taken literally; terms of three or more letters also match
+    # as prefixes, so a half-typed last word still finds something.
+    return f" {operator} ".join(f'"{term}"*' if len(term) >= 3 else f'"{term}"' for term in terms)
+
+
+def search_definitions(conn, text, limit=10):
+    # Reverse dictionary: [(word, definition, score)] whose definition or
+    # examples best match `text`, best first (lower BM25 score is better).
+    # Definitions with every term come first; only if there are fewer than
+    # `limit` of those are ones with any of the rarer terms added.
+    terms = search_terms(text)
+    if not terms:
+        return []
+    if "word_search" not in _tables(conn):
+        return like_search(conn, terms, limit)
+    matches = _ranked(conn, match_expression(terms), limit)
+    if len(matches) < limit and len(terms) > 1:
+        terms = [term for term in terms if not _common_term(conn, term)]
+        if terms:
+            found = {match[0] for match in matches}
+            more = _ranked(conn, match_expression(terms, "OR"), limit + len(matches))
+            matches += [match for match in more if match[0] not in found][: limit - len(matches)]
+    return matches
+
+
+def _ranked(conn, expression, limit):
+    return conn.execute(SEARCH_SQL, (expression, SEARCH_MAX_CANDIDATES, limit)).fetchall()
+
+
+def _common_term(conn, term):
+    # Counting stops at the cap, so this costs far less than ranking.
+    sql = "SELECT count(*) FROM (SELECT 1 FROM word_search WHERE word_search MATCH ? LIMIT ?)"
+    return conn.execute(sql, (match_expression([term]), SEARCH_MAX_CANDIDATES + 1)).fetchone()[0] > SEARCH_MAX_CANDIDATES
+
+
+def like_search(conn, terms, limit=10):
+    # Unranked substring scan for definitions holding every term; the
+    # fallback without FTS5, and the baseline benchmarks/reverse_lookup.py
+    # measures against.
+    where = " AND ".join(["w.definition LIKE ?"] * len(terms))
+    sql = f"SELECT w.word, w.definition, NULL FROM words w WHERE {where} LIMIT ?"
+    return conn.execute(sql, (*(f"%{term}%" for term in terms), limit)).fetchall()
+
+
+def lookup_word(conn, word):
+    row = conn.execute(QUERIES["word"], (word,)).fetchone()
+    return row or conn.execute(QUERIES["word_nocase"], (word,)).fetchone()
+
+
+def words_for_lemma(conn, lemma):
+    return [row[0] for row in conn.execute(QUERIES["lemma"], (lemma,))]
+
+
+def words_with_pos(conn, pos, limit=100):
+    return [row[0] for row in conn.execute(QUERIES["words_for_pos"], (normalize_pos(pos), limit))]
+
+
+def parts_of_speech_for(conn, word):
+    return [row[0] for row in conn.execute(QUERIES["word_pos"], (word,))]
+
+
+def definitions_for(conn, word):
+    return conn.execute(QUERIES["definitions"], (word,)).fetchall()
+
+
+def explain(conn, sql, params=()):
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
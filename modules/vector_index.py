@@ -0,0 +1,208 @@
+import json
+import os
+
+import numpy as np
+
+
+class VectorIndex:
+    # Row-major float32 embedding matrix plus the word stored in each row.
+    #
+    # On disk this is three files sharing one base path:
+    #   <base>.npy        preallocated matrix, opened with mmap
+    #   <base>.words      one word per line, line N is row N ("" = removed row)
+    #   <base>.meta.json  model name, dimension, committed row count and
+    #                     verified row count
+    # New rows are appended in place; the matrix file is only rewritten when
+    # it runs out of capacity. Rows below the verified count are known to be
+    # fully written, so startup checks only the rows after it.
+
+    def __init__(self, path=None, model=None, read_only=False):
+        self.path = path
+        self.model = model
+        self.read_only = read_only
+        self.dim = None
+        self.matrix = None
+        self.words = []
+        self.rows = {}
+        self.verified = 0
+
+        if path:
+            self.matrix_path = path + ".npy"
+            self.words_path = path + ".words"
+            self.meta_path = path + ".meta.json"
+            self._load()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, word):
+        return word in self.rows
+
+    @property
+    def count(self):
+        return len(self.words)
+
+    @property
+    def active_matrix(self):
+        if self.matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self.matrix[: self.count]
+
+    def _load(self):
+        if not all(os.path.exists(p) for p in (self.matrix_path, self.words_path, self.meta_path)):
+            return
+
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if self.model is not None and meta.get("model") != self.model:
+            print(f"Vector index {self.path} was built with {meta.get('model')}, rebuilding for {self.model}")
+            if not self.read_only:
+                for path in (self.matrix_path, self.words_path, self.meta_path):
+                    os.remove(path)
+            return
+
+        self.dim = meta["dim"]
+        self.matrix = np.load(self.matrix_path, mmap_mode="r" if self.read_only else "r+")
+
+        with open(self.words_path, "r", encoding="utf-8") as f:
+            # Only newline-terminated lines are complete; a crash mid-append
+            # can leave part of a word after the last one.
+            lines = f.read().split("\n")
+        partial = lines.pop()
+        self.words = [word or None for word in lines[: meta["count"]]]
+        self.rows = {word: row for row, word in enumerate(self.words) if word}
+        self.verified = min(meta.get("verified", 0), self.count)
+        if (partial or len(lines) != meta["count"]) and not self.read_only:
+            # A crash between the matrix, words and meta writes left the
+            # files disagreeing on the row count, or part of a word with no
+            # newline that the next append would run into. Keep the rows
+            # both agree on and rewrite the words file and meta to match, so
+            # appends land on the line of their row; dropped words are
+            # re-added.
+            self._write_words()
+            self._write_meta()
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim, "count": self.count, "verified": self.verified}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _write_words(self, mode="w", words=None):
+        lines = self.words if words is None else words
+        with open(self.words_path, mode, encoding="utf-8") as f:
+            for word in lines:
+                f.write((word or "") + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _allocate(self, capacity):
+        if not self.path:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+
+        tmp_path = self.matrix_path + ".tmp"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        if self.matrix is not None:
+            matrix[: self.count] = self.matrix[: self.count]
+            # Drop our mapping before replacing the file (required on Windows).
+            self.matrix = None
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self.matrix_path)
+        return np.load(self.matrix_path, mmap_mode="r+")
+
+    def _reserve(self, rows_needed):
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if rows_needed <= capacity:
+            return
+        new_capacity = max(rows_needed, capacity * 2, 1024)
+        if self.path:
+            self.matrix = self._allocate(new_capacity)
+        else:
+            grown = self._allocate(new_capacity)
+            if self.matrix is not None:
+                grown[: self.count] = self.matrix[: self.count]
+            self.matrix = grown
+
+    def put(self, words, vectors):
+        if self.read_only:
+            raise RuntimeError(f"Vector index {self.path} is read-only")
+        if not len(words):
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+        existing = [(self.rows[word], i) for i, word in enumerate(words) if word in self.rows]
+        appended = [(word, i) for i, word in enumerate(words) if word not in self.rows and "\n" not in word]
+
+        start = self.count
+        verified = self._unverify([row for row, _ in existing])
+        self._reserve(self.count + len(appended))
+        for row, i in existing:
+            self.matrix[row] = vectors[i]
+
+        for offset, (word, i) in enumerate(appended):
+            self.matrix[start + offset] = vectors[i]
+            self.rows[word] = start + offset
+        self.words.extend(word for word, _ in appended)
+
+        # Appended rows are written whole, so they extend the verified
+        # prefix unless unchecked rows come before them.
+        self.verified = self.count if verified >= start else verified
+        if self.path:
+            self.matrix.flush()
+            self._write_words("a", [word for word, _ in appended])
+            self._write_meta()
+
+    def _unverify(self, rows):
+        # Before overwriting `rows` in place, move the verified count below
+        # them on disk, so a crash part way through the write is caught by
+        # stale_words on the next start. Returns the count to restore.
+        verified = self.verified
+        if rows and self.path and min(rows) < verified:
+            self.verified = min(rows)
+            self._write_meta()
+        return verified
+
+    def remove(self, words):
+        removed = [self.rows.pop(word) for word in words if word in self.rows]
+        if not removed:
+            return 0
+        self.verified = self._unverify(removed)
+        for row in removed:
+            self.words[row] = None
+            self.matrix[row] = 0.0
+
+        if self.path:
+            self.matrix.flush()
+            self._write_words()
+            self._write_meta()
+        return len(removed)
+
+    def stale_words(self, tolerance=1e-3):
+        # Live rows must be unit length; zero or NaN rows were never fully
+        # written. Only rows after the verified count are read, so an index
+        # that was closed cleanly does not page in its matrix here.
+        if not self.rows or self.verified >= self.count:
+            return []
+        norms = np.linalg.norm(self.matrix[self.verified : self.count], axis=1)
+        bad_rows = np.flatnonzero(~(np.abs(norms - 1.0) <= tolerance)) + self.verified
+        return [self.words[row] for row in bad_rows if self.words[row]]
+
+    def mark_verified(self):
+        # Every row has been checked (and the stale ones rewritten).
+        if self.verified < self.count and not self.read_only:
+            self.verified = self.count
+            if self.path:
+                self._write_meta()
+
+    def missing_words(self, words):
+        return [word for word in dict.fromkeys(words) if word not in self.rows]
+
+    def removed_words(self, words):
+        keep = set(words)
+        return [word for word in self.rows if word not in keep]
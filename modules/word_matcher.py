@@ -0,0 +1,123 @@
+import numpy as np
+
+from modules.vector_index import VectorIndex
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Concatenated:
+    # Read-only view of two lists indexed as one.
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def __getitem__(self, i):
+        return self.first[i] if i < len(self.first) else self.second[i - len(self.first)]
+
+
+class WordMatcher:
+    # Lexicon embeddings live in one row-normalized float32 matrix so a query
+    # is a single matrix-vector product instead of one Doc.similarity per word.
+
+    def __init__(self, load_nlp, index=None, batch_size=256):
+        # load_nlp is called on first embed so an up-to-date index can be
+        # mapped and queried for membership without loading spaCy.
+        self.load_nlp = load_nlp
+        self.index = index if index is not None else VectorIndex()
+        self.batch_size = batch_size
+        # Words added on top of a read-only index (a lexicon bundle's) are
+        # kept in memory and searched alongside it.
+        self.overlay = VectorIndex() if self.index.read_only else None
+
+    def __len__(self):
+        return len(self.index) + (len(self.overlay) if self.overlay is not None else 0)
+
+    def __contains__(self, word):
+        return word in self.index or (self.overlay is not None and word in self.overlay)
+
+    @property
+    def words(self):
+        return self.index.words
+
+    @property
+    def matrix(self):
+        return self.index.active_matrix
+
+    def embed(self, texts):
+        docs = self.load_nlp().pipe(texts, batch_size=self.batch_size)
+        vectors = np.array([doc.vector for doc in docs], dtype=np.float32)
+        return normalize_rows(vectors)
+
+    def add(self, words, vectors=None):
+        # vectors, if given, are embed(words) computed elsewhere (by an
+        # ingest worker process); only the rows for new words are kept.
+        words = list(words)
+        new_words = self.index.missing_words(words)
+        target = self.index
+        if self.overlay is not None:
+            new_words = self.overlay.missing_words(new_words)
+            target = self.overlay
+        if not new_words:
+            return 0
+        if vectors is None:
+            target.put(new_words, self.embed(new_words))
+        else:
+            position = {word: i for i, word in enumerate(words)}
+            target.put(new_words, np.asarray(vectors)[[position[word] for word in new_words]])
+        return len(new_words)
+
+    def refresh(self, words):
+        words = list(dict.fromkeys(words))
+        if words:
+            self.index.put(words, self.embed(words))
+        return len(words)
+
+    def remove(self, words):
+        return self.index.remove(words)
+
+    def sync_words(self, words):
+        # Bring the index in line with an authoritative word list (the words
+        # table): embed only rows that are missing or were left half-written.
+        words = list(words)
+        removed = self.index.removed_words(words)
+        self.remove(removed)
+        added = self.add(words)
+        refreshed = self.refresh(self.index.stale_words())
+        self.index.mark_verified()
+        return added, refreshed, len(removed)
+
+    def top_k(self, text, k=5, threshold=0.0):
+        return self.top_k_many([text], k=k, threshold=threshold)[0]
+
+    def top_k_many(self, texts, k=5, threshold=0.0):
+        if not texts:
+            return []
+        indexes = [index for index in (self.index, self.overlay) if index is not None and index.count]
+        if not indexes:
+            return [[] for _ in texts]
+
+        embedded = self.embed(texts)
+        scores = embedded @ indexes[0].active_matrix.T
+        words = indexes[0].words
+        if len(indexes) > 1:
+            # Overlay columns follow the base index's; its word list is
+            # small, the base one is not copied.
+            scores = np.hstack([scores, embedded @ indexes[1].active_matrix.T])
+            words = _Concatenated(words, indexes[1].words)
+        k = min(k, scores.shape[1])
+        results = []
+        for row in scores:
+            if k < row.shape[0]:
+                candidates = np.argpartition(-row, k - 1)[:k]
+            else:
+                candidates = np.arange(row.shape[0])
+            candidates = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append(
+                [(words[i], float(row[i])) for i in candidates if row[i] > threshold and words[i]]
+            )
+        return results